@@ -1,2 +1,3 @@
+from ._lazyHighlighter import LazyHighlighter
 from ._linePlainTextEdit import LinePlainTextEdit
 from ._lineSideBar import LineSideBarWidget
@@ -0,0 +1,219 @@
+import logging
+import time
+from typing import Optional
+
+from Qt import QtCore
+from Qt import QtGui
+
+from lqtTextEditor._lineRanges import LineRangeSet
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+def get_indent_width(text: str, tab_size: int) -> int:
+    """
+    Get the number of columns of the whitespaces at the start of the given text.
+
+    Args:
+        text: line of text
+        tab_size: number of columns a tabulation character stops at.
+    """
+    indent = text[: len(text) - len(text.lstrip(" \t"))]
+    if "\t" not in indent:
+        return len(indent)
+    return len(indent.expandtabs(tab_size))
+
+
+class BlockMetadata(QtGui.QTextBlockUserData):
+    """
+    Facts about a single block of text, stored on the block itself.
+
+    Args:
+        length: number of characters, without line ending.
+        indent_width: number of columns of the leading whitespaces.
+        flags: custom bit flags, kept when the block text is modified.
+    """
+
+    def __init__(self, length: int = 0, indent_width: int = 0, flags: int = 0):
+        super().__init__()
+        self.length = length
+        self.indent_width = indent_width
+        self.flags = flags
+
+
+class BlockMetadataCache(QtCore.QObject):
+    """
+    Keep a :class:`BlockMetadata` on each block of a document.
+
+    The blocks modified are recomputed as soon as the document change, except for
+    big changes like loading a file, which are recomputed in idle time. Querying a
+    block not recomputed yet computes it immediately, so results are always up to
+    date.
+
+    Args:
+        document: document whose blocks to describe.
+        tab_size: number of columns a tabulation character stops at.
+        time_budget: maximum time in seconds spent computing per event loop
+            iteration.
+        parent: QObject owning this cache.
+    """
+
+    # number of blocks modified from which they are recomputed in idle time
+    _IDLE_BLOCK_COUNT = 100
+
+    filled = QtCore.Signal()
+    """
+    All the blocks that were pending were recomputed.
+    """
+
+    def __init__(
+        self,
+        document: QtGui.QTextDocument,
+        tab_size: int = 4,
+        time_budget: float = 0.008,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self._document = document
+        self._time_budget = time_budget
+        self._tab_size: int = tab_size
+        # line numbers whose metadata is outdated
+        self._pending: LineRangeSet = LineRangeSet()
+
+        self._idle_timer = QtCore.QTimer(self)
+        self._idle_timer.setInterval(0)
+        self._idle_timer.timeout.connect(self._on_idle_timeout)
+
+    @property
+    def pending_count(self) -> int:
+        """
+        Number of blocks waiting to be recomputed in idle time.
+        """
+        return self._pending.count
+
+    @property
+    def tab_size(self) -> int:
+        return self._tab_size
+
+    def _compute_block(self, block: QtGui.QTextBlock) -> BlockMetadata:
+        text = block.text()
+        metadata = block.userData()
+        if not isinstance(metadata, BlockMetadata):
+            metadata = BlockMetadata()
+            block.setUserData(metadata)
+        metadata.length = len(text)
+        metadata.indent_width = get_indent_width(text, self._tab_size)
+        return metadata
+
+    def _compute_blocks(self, start: int, end: int, deadline: float = 0.0) -> int:
+        """
+        Recompute the given range of blocks, ``end`` included.
+
+        Returns:
+            number of the last block done, lower than ``end`` if the deadline was
+            reached.
+        """
+        block = self._document.findBlockByNumber(start)
+        number = start - 1
+        while number < end:
+            if not block.isValid():
+                # the range exceeds the document
+                return end
+            self._compute_block(block)
+            number += 1
+            block = block.next()
+            if deadline and time.perf_counter() >= deadline:
+                break
+        return number
+
+    def _on_idle_timeout(self):
+        deadline = time.perf_counter() + self._time_budget
+        for start, end in list(self._pending):
+            last_computed = self._compute_blocks(start, end, deadline)
+            self._pending.remove(start, last_computed)
+            if time.perf_counter() >= deadline:
+                return
+
+        self._idle_timer.stop()
+        self.filled.emit()
+
+    def _mark_pending(self, start: int, end: int):
+        self._pending.add(start, end)
+        if not self._idle_timer.isActive():
+            self._idle_timer.start()
+
+    def get_metadata(self, line: int) -> Optional[BlockMetadata]:
+        """
+        Get the metadata of the given line, None if the line doesn't exist.
+        """
+        block = self._document.findBlockByNumber(line)
+        if not block.isValid():
+            return None
+        metadata = block.userData()
+        if line in self._pending or not isinstance(metadata, BlockMetadata):
+            self._pending.remove(line, line)
+            metadata = self._compute_block(block)
+        return metadata
+
+    def get_indent_level(self, line: int) -> int:
+        """
+        Get the number of whole tabulations the given line is indented with.
+        """
+        metadata = self.get_metadata(line)
+        return metadata.indent_width // self._tab_size if metadata else 0
+
+    def set_flags(self, line: int, flags: int):
+        """
+        Replace the custom flags of the given line.
+
+        Flags move with the line when lines are inserted or removed above it.
+        """
+        metadata = self.get_metadata(line)
+        if metadata:
+            metadata.flags = flags
+
+    def on_contents_changed(self, position: int, added: int, block_delta: int):
+        """
+        Recompute the blocks modified.
+
+        Args:
+            position: document position where the change starts.
+            added: number of characters added.
+            block_delta: number of blocks added, negative if removed.
+        """
+        document = self._document
+        first_number = document.findBlock(position).blockNumber()
+        # a change up to the end of the document ends after its last character
+        end = min(position + added, document.characterCount() - 1)
+        last_number = document.findBlock(end).blockNumber()
+        if self._pending:
+            self._pending.shift(first_number, block_delta)
+
+        if last_number - first_number < self._IDLE_BLOCK_COUNT:
+            self._compute_blocks(first_number, last_number)
+            self._pending.remove(first_number, last_number)
+            return
+        self._mark_pending(first_number, last_number)
+
+    def clear(self):
+        """
+        Stop computing in idle time and remove the metadata from all the blocks.
+        """
+        self._idle_timer.stop()
+        self._pending.clear()
+        block = self._document.firstBlock()
+        while block.isValid():
+            if isinstance(block.userData(), BlockMetadata):
+                block.setUserData(None)
+            block = block.next()
+
+    def set_tab_size(self, size: int):
+        """
+        Change the number of columns a tabulation character stops at, which
+        requires to recompute the indentation of all the blocks.
+        """
+        if size == self._tab_size:
+            return
+        self._tab_size = size
+        self._mark_pending(0, self._document.blockCount() - 1)
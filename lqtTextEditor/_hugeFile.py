@@ -0,0 +1,209 @@
+import array
+import bisect
+import logging
+import mmap
+import os
+import re
+from pathlib import Path
+from typing import Union
+
+from Qt import QtCore
+
+from lqtTextEditor._worker import CancellableThread
+
+
+LOGGER = logging.getLogger(__name__)
+
+# same line breaks as universal newlines, used when loading a file normally
+_LINE_BREAK_REGEX = re.compile(rb"\r\n|\r|\n")
+
+
+class HugeFileIndex:
+    """
+    Read-only access to the lines of a file without loading it in memory.
+
+    The file is memory-mapped and only the number of line breaks of each
+    fixed-size segment of bytes is stored, so the index stays small for any file
+    size and finding where a line starts only requires to scan a single segment.
+
+    ``\n``, ``\r\n`` and ``\r`` are all line breaks, like with universal newlines.
+
+    The index is built progressively with :meth:`index_next_segment`.
+
+    Args:
+        path: filesystem path to an existing file.
+        encoding: encoding of the file.
+        errors: how decoding errors are handled, see :func:`open`.
+    """
+
+    SEGMENT_SIZE = 2**16
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        encoding: str = "utf-8",
+        errors: str = "replace",
+    ):
+        self.path = Path(path)
+        self.encoding = encoding
+        self.errors = errors
+
+        self._file = open(self.path, "rb")
+        self.size: int = os.fstat(self._file.fileno()).st_size
+        # an empty file cannot be mapped
+        self._mmap = b""
+        if self.size:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # number of line breaks before the start of each segment
+        self._segment_newlines = array.array("Q", [0])
+        self._newline_count: int = 0
+        self._indexed_size: int = 0
+
+    @property
+    def complete(self) -> bool:
+        """
+        True if the whole file has been indexed.
+        """
+        return self._indexed_size >= self.size
+
+    @property
+    def indexed_size(self) -> int:
+        """
+        Number of bytes indexed so far.
+        """
+        return self._indexed_size
+
+    @property
+    def line_count(self) -> int:
+        """
+        Number of lines that can be read so far.
+
+        The last line is only counted once the whole file is indexed.
+        """
+        return self._newline_count + (1 if self.complete else 0)
+
+    def close(self):
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        self._file.close()
+
+    def get_line_position(self, line: int) -> int:
+        """
+        Get the byte position where the given line starts.
+
+        Args:
+            line: line number starting from 0, must be lower than :attr:`line_count`
+        """
+        if line <= 0:
+            return 0
+        # the segment containing the line break that ends the previous line
+        segment = bisect.bisect_left(self._segment_newlines, line) - 1
+        position = segment * self.SEGMENT_SIZE
+        if self._is_split_line_break(position):
+            position += 1
+        for _ in range(line - self._segment_newlines[segment]):
+            position = _LINE_BREAK_REGEX.search(self._mmap, position).end()
+        return position
+
+    def _is_split_line_break(self, position: int) -> bool:
+        """
+        True if the given position is the ``\n`` of a ``\r\n`` starting before it,
+        which means the line break was counted before this position.
+        """
+        return (
+            0 < position < self.size
+            and self._mmap[position - 1 : position + 1] == b"\r\n"
+        )
+
+    def index_next_segment(self) -> bool:
+        """
+        Count the newlines of the next segment of the file.
+
+        Returns:
+            False if the whole file is indexed.
+        """
+        if self.complete:
+            return False
+
+        start = self._indexed_size
+        end = min(start + self.SEGMENT_SIZE, self.size)
+        segment = self._mmap[start:end]
+        line_breaks = segment.count(b"\n")
+        if b"\r" in segment:
+            line_breaks += segment.count(b"\r") - segment.count(b"\r\n")
+        if self._is_split_line_break(start):
+            line_breaks -= 1
+        newline_count = self._newline_count + line_breaks
+
+        # order matters as the index can be read from another thread meanwhile
+        self._segment_newlines.append(newline_count)
+        self._newline_count = newline_count
+        self._indexed_size = end
+        return not self.complete
+
+    def read_text(self, start: int, count: int) -> str:
+        """
+        Read and decode the given range of lines.
+
+        Args:
+            start: first line number to read, starting from 0
+            count: maximum number of lines to read.
+
+        Returns:
+            lines separated by ``\\n``, without the last line ending.
+        """
+        line_count = self.line_count
+        start = max(min(start, line_count), 0)
+        end = min(start + count, line_count)
+        if end <= start:
+            return ""
+
+        position_start = self.get_line_position(start)
+        if end <= self._newline_count:
+            position_end = self.get_line_position(end)
+        else:
+            position_end = self.size
+
+        text = self._mmap[position_start:position_end].decode(
+            self.encoding, self.errors
+        )
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        # exclude the line break ending the last line read
+        if end <= self._newline_count:
+            text = text[:-1]
+        return text
+
+
+class HugeFileIndexer(CancellableThread):
+    """
+    Build a :class:`HugeFileIndex` in a separate thread.
+
+    Args:
+        index: index to build
+        parent: QObject owning this thread.
+    """
+
+    progress_changed = QtCore.Signal(int, int)
+    """
+    number of bytes indexed, total number of bytes
+    """
+
+    # number of segments indexed between each progress signal
+    _SEGMENTS_PER_PROGRESS = 256
+
+    def __init__(self, index: HugeFileIndex, parent=None):
+        super().__init__(parent)
+        self._index = index
+
+    def run(self):
+        index = self._index
+        segments = 0
+        while not self._cancelled and index.index_next_segment():
+            segments += 1
+            if segments % self._SEGMENTS_PER_PROGRESS == 0:
+                self.progress_changed.emit(index.indexed_size, index.size)
+
+        if not self._cancelled:
+            self.progress_changed.emit(index.indexed_size, index.size)
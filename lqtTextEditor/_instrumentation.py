@@ -0,0 +1,120 @@
+import logging
+import time
+
+from Qt import QtCore
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Instrumentation(QtCore.QObject):
+    """
+    Opt-in timers and counters recorded around the hot paths of the widgets.
+
+    Each stage measured accumulates its number of calls, its total and maximum
+    duration, and the number of lines it processed. Disabled by default, in which
+    case measuring only costs a couple of function calls.
+
+    Usage::
+
+        start_time = instrumentation.start()
+        ...
+        instrumentation.stop("stage_name", start_time, line_count)
+
+    Args:
+        parent: QObject owning this instrumentation.
+    """
+
+    stats_reported = QtCore.Signal(object)
+    """
+    Periodically emitted with :attr:`stats` while enabled, if a report interval was
+    set.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._enabled: bool = False
+        self._report_interval: int = 0
+        # stage name: [calls, total duration, max duration, lines]
+        self._stages: dict[str, list] = {}
+
+        self._report_timer = QtCore.QTimer(self)
+        self._report_timer.timeout.connect(self._on_report_timer_timeout)
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    @property
+    def stats(self) -> dict[str, dict[str, float]]:
+        """
+        Measures per stage name since the last reset:
+
+        - ``calls``: number of time the stage was run
+        - ``total``: cumulated duration in seconds
+        - ``max``: longest duration in seconds
+        - ``lines``: cumulated number of lines processed
+        """
+        return {
+            name: {"calls": calls, "total": total, "max": maximum, "lines": lines}
+            for name, (calls, total, maximum, lines) in self._stages.items()
+        }
+
+    def _on_report_timer_timeout(self):
+        self.stats_reported.emit(self.stats)
+
+    def _update_report_timer(self):
+        if self._enabled and self._report_interval > 0:
+            self._report_timer.start(self._report_interval)
+        else:
+            self._report_timer.stop()
+
+    def reset_stats(self):
+        self._stages = {}
+
+    def set_enabled(self, enable: bool):
+        """
+        Start or stop recording. Recorded stats are kept until reset.
+        """
+        self._enabled = enable
+        self._update_report_timer()
+
+    def set_report_interval(self, interval: int):
+        """
+        Emit :attr:`stats_reported` every given milliseconds while enabled.
+
+        Args:
+            interval: 0 to stop reporting.
+        """
+        self._report_interval = interval
+        self._update_report_timer()
+
+    def start(self) -> float:
+        """
+        Returns:
+            the time at which the stage started, or 0 if recording is disabled.
+        """
+        if not self._enabled:
+            return 0.0
+        return time.perf_counter()
+
+    def stop(self, stage: str, start_time: float, lines: int = 0):
+        """
+        Record the end of a stage.
+
+        Args:
+            stage: name the measures are accumulated under.
+            start_time: value returned by :meth:`start`.
+            lines: number of lines processed by the stage.
+        """
+        if not start_time:
+            return
+        duration = time.perf_counter() - start_time
+        measures = self._stages.get(stage)
+        if measures is None:
+            self._stages[stage] = [1, duration, duration, lines]
+            return
+        measures[0] += 1
+        measures[1] += duration
+        measures[2] = max(measures[2], duration)
+        measures[3] += lines
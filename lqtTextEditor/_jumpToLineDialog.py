@@ -14,15 +14,16 @@ class JumpToLineDialog(QtWidgets.QDialog):
 
     Args:
         max_lines: maximal number of lines in the parent editor
+        first_line: number of the first line that can be jumped to
     """
 
-    def __init__(self, max_lines: int, parent=None):
+    def __init__(self, max_lines: int, parent=None, first_line: int = 1):
         super().__init__(parent=parent)
 
         self.layout = QtWidgets.QVBoxLayout()
         self.layout_center = QtWidgets.QHBoxLayout()
         self.label = QtWidgets.QLabel("Line Number:")
-        validator = QtGui.QIntValidator(1, max_lines, self)
+        validator = QtGui.QIntValidator(first_line, max_lines, self)
         self.line_edit = QtWidgets.QLineEdit()
         self.buttons = QtWidgets.QDialogButtonBox(
             QtWidgets.QDialogButtonBox.Ok | QtWidgets.QDialogButtonBox.Cancel
@@ -0,0 +1,267 @@
+import logging
+import time
+
+from Qt import QtCore
+from Qt import QtGui
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class LazyHighlighter:
+    """
+    Base class to implement syntax highlighting for :class:`LinePlainTextEdit`.
+
+    Unlike ``QSyntaxHighlighter``, blocks are not all highlighted when the document
+    change: visible blocks are highlighted first, and the rest of the document is
+    processed in idle time.
+
+    Like ``QSyntaxHighlighter``, a state can be carried from a block to the next
+    one, for example to handle multi-line comments.
+    """
+
+    def highlight_block(
+        self,
+        text: str,
+        state: int,
+    ) -> tuple[list[tuple[int, int, QtGui.QTextCharFormat]], int]:
+        """
+        To override. Compute the formats of a single block.
+
+        The default implementation applies no format and carries the state as is.
+
+        Args:
+            text: text of the block, without line ending.
+            state: state returned for the previous block, -1 for the first block.
+
+        Returns:
+            list of ``(start, length, format)`` to apply on the text, and the state
+            to carry to the next block.
+        """
+        return [], state
+
+
+class LazyHighlightScheduler(QtCore.QObject):
+    """
+    Decide which blocks of a document to highlight and when.
+
+    Blocks before :attr:`frontier` were highlighted in order so their state is
+    exact. Blocks displayed after it are highlighted with an approximated state,
+    until the frontier, advanced in idle time, reach them.
+
+    Args:
+        document: document to highlight
+        highlighter: compute the formats of each block.
+        time_budget: maximum time in seconds spent highlighting per event loop
+            iteration.
+        parent: QObject owning this scheduler.
+    """
+
+    # number of blocks to the frontier below which displayed blocks are highlighted
+    # in order instead of approximated
+    _EXACT_DISTANCE = 2000
+
+    def __init__(
+        self,
+        document: QtGui.QTextDocument,
+        highlighter: LazyHighlighter,
+        time_budget: float = 0.008,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self._document = document
+        self._highlighter = highlighter
+        self._time_budget = time_budget
+        self._frontier: int = 0
+        # blocks after the frontier highlighted with an approximated state
+        self._approximated: set[int] = set()
+        self._applying: bool = False
+
+        self._idle_timer = QtCore.QTimer(self)
+        self._idle_timer.setInterval(0)
+        self._idle_timer.timeout.connect(self._on_idle_timeout)
+
+    @property
+    def applying(self) -> bool:
+        """
+        True while formats are applied on the document, which emits contentsChange.
+        """
+        return self._applying
+
+    @property
+    def frontier(self) -> int:
+        """
+        Number of the first block not highlighted with an exact state.
+        """
+        return self._frontier
+
+    def _get_previous_state(self, block: QtGui.QTextBlock) -> int:
+        previous_block = block.previous()
+        return previous_block.userState() if previous_block.isValid() else -1
+
+    def _highlight_block(self, block: QtGui.QTextBlock, state: int) -> int:
+        """
+        Apply the highlighter formats on the given block.
+
+        Returns:
+            the state to carry to the next block.
+        """
+        formats, new_state = self._highlighter.highlight_block(block.text(), state)
+
+        format_ranges = []
+        for start, length, text_format in formats:
+            format_range = QtGui.QTextLayout.FormatRange()
+            format_range.start = start
+            format_range.length = length
+            format_range.format = text_format
+            format_ranges.append(format_range)
+
+        layout = block.layout()
+        self._applying = True
+        block.setUserState(new_state)
+        # avoid relayouting blocks that never had formats
+        if format_ranges or layout.formats():
+            layout.setFormats(format_ranges)
+            self._document.markContentsDirty(block.position(), block.length())
+        self._applying = False
+        return new_state
+
+    def _on_idle_timeout(self):
+        """
+        Advance the frontier for the time budget.
+        """
+        deadline = time.perf_counter() + self._time_budget
+        self.advance_frontier(self._document.blockCount() - 1, deadline)
+
+    def advance_frontier(self, last_number: int, deadline: float = 0.0):
+        """
+        Highlight in order the blocks from the frontier to the given block.
+
+        Args:
+            last_number: number of the last block to highlight, included.
+            deadline: ``time.perf_counter()`` value after which highlighting is
+                stopped and resumed in idle time. 0 for no limit.
+        """
+        block = self._document.findBlockByNumber(self._frontier)
+        state = self._get_previous_state(block)
+
+        while block.isValid() and self._frontier <= last_number:
+            state = self._highlight_block(block, state)
+            self._approximated.discard(self._frontier)
+            self._frontier += 1
+            block = block.next()
+            if deadline and time.perf_counter() >= deadline:
+                break
+
+        if block.isValid():
+            if not self._idle_timer.isActive():
+                self._idle_timer.start()
+        else:
+            self._idle_timer.stop()
+            self._approximated = set()
+
+    def highlight_blocks(self, first_number: int, last_number: int):
+        """
+        Make sure the given range of blocks is highlighted, like the visible ones.
+
+        Args:
+            first_number: first block number
+            last_number: last block number, included.
+        """
+        if last_number < self._frontier:
+            return
+
+        if first_number - self._frontier <= self._EXACT_DISTANCE:
+            self.advance_frontier(last_number)
+            return
+
+        block = self._document.findBlockByNumber(first_number)
+        state = -1
+        while block.isValid() and block.blockNumber() <= last_number:
+            number = block.blockNumber()
+            if number in self._approximated:
+                state = block.userState()
+            else:
+                state = self._highlight_block(block, state)
+                self._approximated.add(number)
+            block = block.next()
+
+    def on_contents_changed(self, position: int, added: int, block_delta: int):
+        """
+        Re-highlight the blocks modified, and the following ones until their state
+        is the same as before.
+
+        Args:
+            position: document position where the change starts.
+            added: number of characters added.
+            block_delta: number of blocks added, negative if removed.
+        """
+        document = self._document
+        first_block = document.findBlock(position)
+        first_number = first_block.blockNumber()
+        # a change up to the end of the document ends after its last character
+        end = min(position + added, document.characterCount() - 1)
+        last_number = document.findBlock(end).blockNumber()
+
+        if block_delta:
+            self._approximated = set()
+        else:
+            for number in range(first_number, last_number + 1):
+                self._approximated.discard(number)
+
+        # blocks after the change are still exact but were renumbered
+        if self._frontier <= last_number - block_delta:
+            self._frontier = min(self._frontier, first_number)
+            self._idle_timer.start()
+            return
+        self._frontier += block_delta
+
+        deadline = time.perf_counter() + self._time_budget
+        block = first_block
+        state = self._get_previous_state(block)
+        while block.isValid() and block.blockNumber() < self._frontier:
+            number = block.blockNumber()
+            previous_state = block.userState()
+            state = self._highlight_block(block, state)
+            if number >= last_number and state == previous_state:
+                return
+            block = block.next()
+            if time.perf_counter() >= deadline:
+                break
+
+        if block.isValid():
+            # next blocks may have a wrong state, continue in idle time
+            self._frontier = min(self._frontier, block.blockNumber())
+            self._idle_timer.start()
+
+    def clear(self):
+        """
+        Stop highlighting and remove the formats applied on the whole document.
+        """
+        self.stop()
+        self._applying = True
+        block = self._document.firstBlock()
+        while block.isValid():
+            layout = block.layout()
+            if layout.formats():
+                layout.setFormats([])
+                self._document.markContentsDirty(block.position(), block.length())
+            block.setUserState(-1)
+            block = block.next()
+        self._applying = False
+        self._frontier = 0
+        self._approximated = set()
+
+    def reset(self):
+        """
+        Highlight the whole document again, from the start.
+        """
+        self._frontier = 0
+        self._approximated = set()
+        self._idle_timer.start()
+
+    def stop(self):
+        """
+        Stop highlighting in idle time. Formats already applied are kept.
+        """
+        self._idle_timer.stop()
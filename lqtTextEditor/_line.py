@@ -1,5 +1,4 @@
-import copy
-import dataclasses
+import bisect
 from typing import Optional
 
 from Qt import QtCore
@@ -47,11 +46,18 @@ class TextLine:
         self,
         qstyleoption: QtWidgets.QStyleOptionViewItem,
         apply_alternate: bool = True,
+        geometry: Optional[QtCore.QRectF] = None,
     ):
         """
         Transfer this instance attributes to the given QStyleOptionViewItem.
+
+        Args:
+            qstyleoption: option to modify inplace
+            apply_alternate: False to ignore the alternate state of the line
+            geometry: override this line geometry with the given one.
         """
-        qstyleoption.rect = self.geometry.toRect()
+        geometry = geometry or self.geometry
+        qstyleoption.rect = geometry.toRect()
 
         if qstyleoption.state & QStyle.State_MouseOver and not self.hovered:
             qstyleoption.state = qstyleoption.state ^ QStyle.State_MouseOver
@@ -77,27 +83,62 @@ class TextLine:
 class TextLineBuffer:
     """
     A list of lines with convenient method for manipulation.
+
+    Lines are kept sorted by their top edge and indexed by line number so lookups
+    don't need to scan the whole buffer.
+
+    The geometry of a line must not be modified while the buffer is in use, else
+    the position index become invalid. Modified lines can be added to a new buffer.
     """
 
     def __init__(self, lines: Optional[list[TextLine]] = None):
         super().__init__()
-        self._lines: list[TextLine] = lines or []
+        self._lines: list[TextLine] = []
+        # top edge of each line in ``_lines``, at the same index.
+        self._tops: list[float] = []
+        self._lines_by_number: dict[int, TextLine] = {}
+
+        for line in lines or []:
+            self.add_line(line)
 
     def __iter__(self):
         return self._lines.__iter__()
 
+    def __len__(self):
+        return len(self._lines)
+
+    @property
+    def first_line(self) -> Optional[TextLine]:
+        return self._lines[0] if self._lines else None
+
+    @property
+    def last_line(self) -> Optional[TextLine]:
+        return self._lines[-1] if self._lines else None
+
     @property
     def selected_lines(self) -> list[TextLine]:
         return [line for line in self._lines if line.selected]
 
     def add_line(self, text_line: TextLine):
-        self._lines.append(text_line)
+        top = text_line.geometry.top()
+        # lines are usually added from top to bottom so skip the bisect
+        if not self._tops or top >= self._tops[-1]:
+            self._lines.append(text_line)
+            self._tops.append(top)
+        else:
+            index = bisect.bisect_right(self._tops, top)
+            self._lines.insert(index, text_line)
+            self._tops.insert(index, top)
+
+        self._lines_by_number[text_line.number] = text_line
 
     def clear_all_lines(self):
         """
         Remove all lines stored.
         """
         self._lines = []
+        self._tops = []
+        self._lines_by_number = {}
 
     def copy(self):
         return self.__class__(lines=[line.copy() for line in self._lines])
@@ -106,25 +147,34 @@ class TextLineBuffer:
         """
         Remove all the lines that doesn't have the given line numbers.
         """
-        for line in self._lines:
-            if line.number not in lines_numbers:
-                self.remove_line(line)
+        lines_numbers = set(lines_numbers)
+        lines = [line for line in self._lines if line.number in lines_numbers]
+        self._lines = lines
+        self._tops = [line.geometry.top() for line in lines]
+        self._lines_by_number = {line.number: line for line in lines}
 
     def remove_line(self, text_line: Optional[TextLine]):
         """
         Remove the given line. Will raise if the line was never added previously.
         """
-        if text_line:
-            self._lines.remove(text_line)
+        if not text_line:
+            return
+
+        top = text_line.geometry.top()
+        index = bisect.bisect_left(self._tops, top)
+        while self._lines[index] is not text_line:
+            index += 1
+
+        del self._lines[index]
+        del self._tops[index]
+        if self._lines_by_number.get(text_line.number) is text_line:
+            del self._lines_by_number[text_line.number]
 
     def get_line_by_number(self, number) -> Optional[TextLine]:
         """
         Get the line object corresponding to the given number, None if not found.
         """
-        line = [line for line in self._lines if line.number == number]
-        if line:
-            return line[0]
-        return None
+        return self._lines_by_number.get(number)
 
     def get_line_from_position(self, position: QtCore.QPoint) -> Optional[TextLine]:
         """
@@ -134,7 +184,117 @@ class TextLineBuffer:
         Returns:
             text ine instance for the given position
         """
-        for line in self._lines:
-            if line.geometry.contains(QtCore.QPointF(position)):
-                return line
+        position = QtCore.QPointF(position)
+        line = self.get_line_from_y(position.y())
+        if line and line.geometry.contains(position):
+            return line
         return None
+
+    def get_lines_between(self, top: float, bottom: float) -> list[TextLine]:
+        """
+        Get all the lines whose geometry vertically intersect the given range.
+
+        Args:
+            top: vertical coordinate expressed in local widget coordinates.
+            bottom: vertical coordinate expressed in local widget coordinates.
+        """
+        start = max(bisect.bisect_right(self._tops, top) - 1, 0)
+        end = bisect.bisect_right(self._tops, bottom)
+        if start < end and self._lines[start].geometry.bottom() < top:
+            start += 1
+        return self._lines[start:end]
+
+    def get_line_from_y(self, y: float) -> Optional[TextLine]:
+        """
+        Args:
+            y: vertical coordinate expressed in local widget coordinates.
+
+        Returns:
+            text line instance whose geometry vertically contains the given y.
+        """
+        index = bisect.bisect_right(self._tops, y) - 1
+        if index < 0:
+            return None
+
+        line = self._lines[index]
+        if line.geometry.top() <= y <= line.geometry.bottom():
+            return line
+        return None
+
+
+class TextLineBufferView:
+    """
+    A read-only view over a :class:`TextLineBuffer` with a different horizontal
+    geometry and a vertical offset.
+
+    Lines are shared with the source buffer, so a state change on the source
+    (hovered, selected, ...) is directly visible. The transform is only applied
+    when the geometry is requested with :meth:`map_geometry`.
+
+    Args:
+        buffer: source buffer to create a view of.
+        x: left edge of all the lines.
+        width: width of all the lines.
+        top_offset: vertical offset added to the lines top edge.
+    """
+
+    def __init__(
+        self,
+        buffer: Optional[TextLineBuffer] = None,
+        x: float = 0,
+        width: float = 0,
+        top_offset: float = 0,
+    ):
+        self.buffer: TextLineBuffer = TextLineBuffer() if buffer is None else buffer
+        self.x = x
+        self.width = width
+        self.top_offset = top_offset
+
+    def __iter__(self):
+        return self.buffer.__iter__()
+
+    def __len__(self):
+        return len(self.buffer)
+
+    @property
+    def selected_lines(self) -> list[TextLine]:
+        return self.buffer.selected_lines
+
+    def get_line_by_number(self, number) -> Optional[TextLine]:
+        return self.buffer.get_line_by_number(number)
+
+    def get_line_from_position(self, position: QtCore.QPoint) -> Optional[TextLine]:
+        """
+        Args:
+            position: expressed in the view coordinates.
+
+        Returns:
+            text line instance for the given position
+        """
+        if not self.x <= position.x() <= self.x + self.width:
+            return None
+        return self.buffer.get_line_from_y(position.y() - self.top_offset)
+
+    def get_lines_between(self, top: float, bottom: float) -> list[TextLine]:
+        """
+        Get all the lines whose geometry vertically intersect the given range.
+
+        Args:
+            top: vertical coordinate expressed in the view coordinates.
+            bottom: vertical coordinate expressed in the view coordinates.
+        """
+        return self.buffer.get_lines_between(
+            top - self.top_offset,
+            bottom - self.top_offset,
+        )
+
+    def map_geometry(self, text_line: TextLine) -> QtCore.QRectF:
+        """
+        Get the geometry of the given line expressed in this view coordinates.
+        """
+        return QtCore.QRectF(
+            self.x,
+            text_line.geometry.top() + self.top_offset,
+            self.width,
+            text_line.geometry.height(),
+        )
@@ -0,0 +1,49 @@
+import logging
+import threading
+from typing import Iterable
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class LineAppendBuffer:
+    """
+    Thread-safe list of lines waiting to be appended to a document.
+
+    Producers can add lines from any thread while the GUI thread regularly takes
+    all of them at once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._lines: list[str] = []
+
+    def __len__(self):
+        return len(self._lines)
+
+    def add(self, lines: Iterable[str]) -> bool:
+        """
+        Queue the given lines, with or without their line ending.
+
+        Returns:
+            True if lines were added to an empty buffer, so they must be taken
+            later.
+        """
+        lines = [line.rstrip("\r\n") for line in lines]
+        with self._lock:
+            was_empty = not self._lines and bool(lines)
+            self._lines.extend(lines)
+        return was_empty
+
+    def clear(self):
+        with self._lock:
+            self._lines = []
+
+    def take(self) -> list[str]:
+        """
+        Remove and return all the lines queued so far.
+        """
+        with self._lock:
+            lines = self._lines
+            self._lines = []
+        return lines
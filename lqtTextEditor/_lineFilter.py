@@ -0,0 +1,53 @@
+import logging
+import re
+
+from Qt import QtCore
+from Qt import QtGui
+
+from lqtTextEditor._worker import LineChunkWorker
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class LineFilterWorker(LineChunkWorker):
+    """
+    Find the lines of a document matching a regex pattern, in a separate thread.
+
+    The lines are processed by chunks, and the result of each chunk is emitted with
+    :attr:`chunk_processed` as soon as available.
+
+    Args:
+        document: document whose lines to filter.
+        pattern: compiled regex searched in each line.
+        chunk_length: approximate number of characters processed per chunk.
+        parent: QObject owning this thread.
+    """
+
+    chunk_processed = QtCore.Signal(int, int, object)
+    """
+    first line number of the chunk, last line number (included),
+    sorted list of matching line numbers
+    """
+
+    def __init__(
+        self,
+        document: QtGui.QTextDocument,
+        pattern: re.Pattern,
+        chunk_length: int = 2**20,
+        parent=None,
+    ):
+        super().__init__(document, chunk_length=chunk_length, parent=parent)
+        self._pattern = pattern
+
+    def run(self):
+        search = self._pattern.search
+        for line_number, lines in self.iter_line_chunks():
+            matches = [
+                line_number + index for index, line in enumerate(lines) if search(line)
+            ]
+            self.chunk_processed.emit(
+                line_number,
+                line_number + len(lines) - 1,
+                matches,
+            )
@@ -0,0 +1,115 @@
+import logging
+import re
+from typing import Callable
+from typing import Optional
+
+from Qt import QtCore
+from Qt import QtGui
+
+from lqtTextEditor._worker import LineChunkWorker
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+def sort_lines(lines: list[str], reverse: bool = False) -> list[str]:
+    return sorted(lines, reverse=reverse)
+
+
+def dedupe_lines(lines: list[str]) -> list[str]:
+    """
+    Remove the duplicated lines, keeping the first occurrence.
+    """
+    return list(dict.fromkeys(lines))
+
+
+def reverse_lines(lines: list[str]) -> list[str]:
+    return lines[::-1]
+
+
+def trim_lines(lines: list[str]) -> list[str]:
+    """
+    Remove the trailing whitespaces of each line.
+    """
+    return [line.rstrip() for line in lines]
+
+
+def keep_lines_matching(
+    lines: list[str],
+    pattern: re.Pattern,
+    invert: bool = False,
+) -> list[str]:
+    """
+    Keep only the lines where the pattern is found, or not found if ``invert``.
+    """
+    search = pattern.search
+    return [line for line in lines if bool(search(line)) is not invert]
+
+
+class LineOperationWorker(LineChunkWorker):
+    """
+    Apply a function on some lines of a document, in a separate thread.
+
+    The lines processed are extracted from the given ranges and passed all at once
+    to the function. The result is split back per range, in the same order, to be
+    applied with :attr:`processed`.
+
+    Args:
+        document: document whose lines to process.
+        ranges: sorted ``(start, end)`` line numbers to process, ``end`` included.
+        function: receive the list of lines and return the new list of lines. Can
+            return less or more lines.
+        parent: QObject owning this thread.
+    """
+
+    processed = QtCore.Signal(object)
+    """
+    list of new lines for each range, in the order of the ranges. Lines returned
+    in excess are all in the last range.
+    """
+
+    def __init__(
+        self,
+        document: QtGui.QTextDocument,
+        ranges: list[tuple[int, int]],
+        function: Callable[[list[str]], list[str]],
+        parent=None,
+    ):
+        super().__init__(document, ranges[0][0], ranges[-1][1], parent=parent)
+        self._ranges = ranges
+        self._function = function
+
+        self.error: Optional[Exception] = None
+        """
+        exception raised by the function if any
+        """
+
+    def run(self):
+        lines = []
+        for _, chunk in self.iter_line_chunks():
+            lines += chunk
+        if self._cancelled:
+            return
+
+        first_line = self._ranges[0][0]
+        selected_lines = []
+        for start, end in self._ranges:
+            selected_lines.extend(lines[start - first_line : end - first_line + 1])
+        del lines
+
+        try:
+            new_lines = self._function(selected_lines)
+        except Exception as error:
+            self.error = error
+            return
+
+        chunks = []
+        index = 0
+        for start, end in self._ranges:
+            chunks.append(new_lines[index : index + end - start + 1])
+            index += end - start + 1
+        if chunks and index < len(new_lines):
+            chunks[-1].extend(new_lines[index:])
+
+        if not self._cancelled:
+            self.processed.emit(chunks)
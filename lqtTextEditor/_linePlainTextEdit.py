@@ -1,14 +1,43 @@
+import functools
 import logging
+import re
+import time
+from pathlib import Path
+from typing import Callable
+from typing import Iterable
 from typing import Optional
+from typing import Union
 
 from Qt import QtGui
 from Qt import QtCore
 from Qt import QtWidgets
 
+from lqtTextEditor._blockMetadata import BlockMetadataCache
 from lqtTextEditor._lineSideBar import LineSideBarWidget
 from lqtTextEditor._jumpToLineDialog import JumpToLineDialog
+from lqtTextEditor._lineAppendBuffer import LineAppendBuffer
+from lqtTextEditor._lineFilter import LineFilterWorker
+from lqtTextEditor._lineOperation import LineOperationWorker
+from lqtTextEditor._lineOperation import dedupe_lines
+from lqtTextEditor._lineOperation import keep_lines_matching
+from lqtTextEditor._lineOperation import reverse_lines
+from lqtTextEditor._lineOperation import sort_lines
+from lqtTextEditor._lineOperation import trim_lines
+from lqtTextEditor._lineRanges import LineRangeSet
+from lqtTextEditor._lineRanges import group_lines_as_ranges
+from lqtTextEditor._hugeFile import HugeFileIndex
+from lqtTextEditor._hugeFile import HugeFileIndexer
+from lqtTextEditor._instrumentation import Instrumentation
+from lqtTextEditor._lazyHighlighter import LazyHighlighter
+from lqtTextEditor._lazyHighlighter import LazyHighlightScheduler
 from lqtTextEditor._line import TextLine
 from lqtTextEditor._line import TextLineBuffer
+from lqtTextEditor._line import TextLineBufferView
+from lqtTextEditor._repaintScheduler import RepaintScheduler
+from lqtTextEditor._textFinder import FindMatchIndex
+from lqtTextEditor._textFinder import FindWorker
+from lqtTextEditor._textFinder import find_in_lines
+from lqtTextEditor._textLoader import TextLoaderWorker
 
 
 LOGGER = logging.getLogger(__name__)
@@ -21,6 +50,81 @@ class LinePlainTextEdit(QtWidgets.QPlainTextEdit):
     The line number is displayed in a widget called sidebar.
     """
 
+    # number of unchanged blocks from which a visibility change is relayouted apart
+    _DIRTY_SPAN_MAX_GAP = 1024
+
+    # number of lines of a huge file kept in the document above and below the viewport
+    _HUGE_FILE_MARGIN = 1000
+
+    # number of lines highlighted above and below the visible ones
+    _HIGHLIGHT_MARGIN = 200
+
+    # number of lines modified at once from which the whole document is searched
+    # again in a separate thread, instead of only searching the modified lines
+    _FIND_UPDATE_MAX_LINES = 1000
+
+    filter_progress = QtCore.Signal(int, int)
+    """
+    A filter processed more lines: number of lines processed, total number of lines
+    """
+
+    filter_match_count_changed = QtCore.Signal(int)
+    """
+    A filter found new matching lines: total number of lines matching so far
+    """
+
+    filter_finished = QtCore.Signal(int)
+    """
+    A filter processed the whole document: total number of lines matching
+    """
+
+    load_progress = QtCore.Signal(int, int)
+    """
+    More text was loaded: progress, total (bytes for a file, lines for an iterable
+    where the total is -1)
+    """
+
+    load_finished = QtCore.Signal(bool)
+    """
+    Loading stopped: True if all the text was loaded, False on error or cancel.
+    """
+
+    # lines were queued to be appended, possibly from another thread
+    _lines_queued = QtCore.Signal()
+
+    huge_file_progress = QtCore.Signal(int, int)
+    """
+    More of the huge file was indexed: number of bytes indexed, total of bytes
+    """
+
+    find_match_count_changed = QtCore.Signal(int)
+    """
+    A search found new matches: total number of matches so far
+    """
+
+    find_finished = QtCore.Signal(int)
+    """
+    A search processed the whole document: total number of matches
+    """
+
+    replace_finished = QtCore.Signal(int)
+    """
+    A replace-all stopped: number of replacements applied, 0 on cancel or if the
+    document was modified meanwhile.
+    """
+
+    line_operation_finished = QtCore.Signal(bool)
+    """
+    A line operation stopped: True if its result was applied, False on error, cancel
+    or if the document was modified meanwhile.
+    """
+
+    reduced_styling_changed = QtCore.Signal(bool)
+    """
+    The per-line items stopped (True) or started again (False) being painted,
+    according to the performance profile.
+    """
+
     def __init__(self, parent=None):
         super().__init__(parent)
 
@@ -28,316 +132,2097 @@ class LinePlainTextEdit(QtWidgets.QPlainTextEdit):
         self._left_margin: int = 0
         self._tab_character = " " * 4
         self._mouse_pressed = False
+        self._hovered_line: Optional[TextLine] = None
         self._lines: TextLineBuffer = TextLineBuffer()
+        # what the sidebar display, shared with ``_lines``
+        self._sidebar_lines: TextLineBufferView = TextLineBufferView()
         self._alternating_row_colors = False
 
-        self._sidebar = LineSideBarWidget(self)
+        self._hidden_ranges: LineRangeSet = LineRangeSet()
+        self._filter_worker: Optional[LineFilterWorker] = None
+        self._filter_match_count: int = 0
+        self._filter_revision: int = 0
+        self._loader: Optional[TextLoaderWorker] = None
+        self._load_undo_enabled: bool = True
+        self._load_timer = QtCore.QTimer(self)
+        self._load_timer.setInterval(0)
+        self._load_timer.timeout.connect(self._on_load_timer_timeout)
+        self._append_buffer = LineAppendBuffer()
+        self._append_timer = QtCore.QTimer(self)
+        self._append_timer.setInterval(16)
+        self._append_timer.timeout.connect(self._on_append_timer_timeout)
+        self._lines_queued.connect(self._on_lines_queued)
+        self._follow_mode: bool = False
+        self._follow_undo_enabled: bool = True
+        self._maximum_line_count: int = 0
+        # number of lines removed from the top of the document by the line limit
+        self._line_number_offset: int = 0
+        self._huge_file: Optional[HugeFileIndex] = None
+        self._huge_file_indexer: Optional[HugeFileIndexer] = None
+        # True while the document content is replaced by a window of the huge file
+        self._materializing: bool = False
+        # widget state modified while a huge file is open
+        self._huge_file_previous_state: tuple = ()
+        self._huge_scrollbar = QtWidgets.QScrollBar(QtCore.Qt.Vertical, self)
+        self._huge_scrollbar.hide()
+        self._huge_scrollbar.valueChanged.connect(self._on_huge_scrollbar_changed)
+        self._rematerialize_timer = QtCore.QTimer(self)
+        self._rematerialize_timer.setSingleShot(True)
+        self._rematerialize_timer.timeout.connect(self._rematerialize_huge_file)
+        # to find how many blocks were inserted/removed on contents change
+        self._known_block_count: int = self.document().blockCount()
+        # True while the top of the document is being trimmed
+        self._trimming: bool = False
+        self._line_operation_worker: Optional[LineOperationWorker] = None
+        self._find_worker: Optional[FindWorker] = None
+        self._find_index: FindMatchIndex = FindMatchIndex()
+        self._find_pattern: Optional[re.Pattern] = None
+        # visible matches that have an extra selection
+        self._find_highlight_key: tuple = ()
+        # search the whole document again once it stopped being modified
+        self._find_refresh_timer = QtCore.QTimer(self)
+        self._find_refresh_timer.setSingleShot(True)
+        self._find_refresh_timer.setInterval(300)
+        self._find_refresh_timer.timeout.connect(self._on_find_refresh_timeout)
+        self._replace_worker: Optional[FindWorker] = None
+        self._replace_matches: list[tuple] = []
+        # True while lines are replaced with the result of a line operation
+        self._replacing_lines: bool = False
+        self._block_count_updates_deferred: bool = False
+        self._highlight_scheduler: Optional[LazyHighlightScheduler] = None
+
+        # performance profile thresholds, 0 when disabled
+        self._reduced_scroll_speed: float = 0
+        self._reduced_visible_lines: int = 0
+        self._reduced_document_lines: int = 0
+        # True while per-line items and hover are not painted
+        self._reduced_styling: bool = False
+        self._fast_scrolling: bool = False
+        self._last_scroll: tuple[float, int] = (0.0, 0)
+        self._scroll_idle_timer = QtCore.QTimer(self)
+        self._scroll_idle_timer.setSingleShot(True)
+        self._scroll_idle_timer.setInterval(200)
+        self._scroll_idle_timer.timeout.connect(self._on_scroll_idle)
+        # extra selections of each feature, combined when set on the widget
+        self._extra_selections: dict[str, list[QtWidgets.QTextEdit.ExtraSelection]]
+        self._extra_selections = {}
+        # ranges of the sidebar selection that have an extra selection
+        self._sidebar_selection_key: tuple = ()
+        # first line whose number changed since the last block count update
+        self._renumbered_line: Optional[int] = None
+
+        # True when the layout of the document changed and lines must be rebuilt
+        self._lines_dirty: bool = True
+        self._lines_scroll_key: tuple = ()
+        self._lines_viewport_size: QtCore.QSize = QtCore.QSize()
+        self._lines_stats: dict[str, int] = {}
+        self.reset_lines_update_stats()
+
+        self._repaint_scheduler = RepaintScheduler(self)
+        self._instrumentation = Instrumentation(self)
+        self._block_metadata: Optional[BlockMetadataCache] = None
+        self._sidebar = LineSideBarWidget(self)
+        self._sidebar.set_repaint_scheduler(self._repaint_scheduler)
+        self._sidebar.set_instrumentation(self._instrumentation)
+
+        # generate event on hovering
+        self.setAttribute(QtCore.Qt.WA_Hover, True)
+
+        self.updateRequest.connect(self._on_update_requested)
+        self.blockCountChanged.connect(self._on_block_count_changed)
+        self.cursorPositionChanged.connect(self._on_selection_changed)
+        self.document().contentsChange.connect(self._on_contents_changed)
+        layout = self.document().documentLayout()
+        layout.documentSizeChanged.connect(self._invalidate_lines)
+        self._sidebar.line_selection_changed.connect(self._on_sidebar_selection_changed)
+        self._sidebar.intended_width_changed.connect(self._on_sidebar_width_changed)
+        self._sidebar.auto_scroll_requested.connect(self._on_sidebar_auto_scroll)
+        self.verticalScrollBar().valueChanged.connect(self._on_vertical_scroll_changed)
+
+        self._update_margins()
+
+    @property
+    def block_metadata(self) -> Optional[BlockMetadataCache]:
+        """
+        Length, indentation and custom flags of each line, kept up to date with the
+        document. None unless enabled with :meth:`set_block_metadata_enabled`.
+        """
+        return self._block_metadata
+
+    @property
+    def instrumentation(self) -> Instrumentation:
+        """
+        Timers and counters on the update stages and paint, disabled by default.
+        """
+        return self._instrumentation
+
+    @property
+    def line_number_offset(self) -> int:
+        """
+        Number of lines removed from the top of the document due to the maximum line
+        count. Added to the line numbers displayed so they stay absolute.
+        """
+        return self._line_number_offset
+
+    @property
+    def lines_update_stats(self) -> dict[str, int]:
+        """
+        Counters on how the buffer of visible lines was rebuilt, reused or updated.
+        """
+        return dict(self._lines_stats)
+
+    @property
+    def repaint_scheduler(self) -> RepaintScheduler:
+        """
+        Object merging repaint requests of this widget and its sidebar.
+        """
+        return self._repaint_scheduler
+
+    @property
+    def selected_lines_start(self) -> int:
+        """
+        Line number of the beginning of the selection
+        """
+        cursor = self.textCursor()
+        start = cursor.selectionStart()
+        cursor.setPosition(start)
+        return cursor.blockNumber()
+
+    @property
+    def selected_lines_end(self) -> int:
+        """
+        Line number of the end of the selection
+        """
+        cursor = self.textCursor()
+        end = cursor.selectionEnd()
+        cursor.setPosition(end)
+        return cursor.blockNumber()
+
+    def _get_last_line_number(self) -> int:
+        """
+        Number displayed for the last line of the document, starting from 1.
+        """
+        if self._huge_file:
+            return max(self._huge_file.line_count, self.blockCount())
+        return self.blockCount() + self._line_number_offset
+
+    def _get_document_line_count(self) -> int:
+        if self._huge_file:
+            return self._huge_file.line_count
+        return self.blockCount()
+
+    def _get_viewport_dependent_lines(self) -> set[int]:
+        """
+        Number of the visible lines whose style depends on their place in the
+        viewport: first, last and hovered line.
+        """
+        lines = {self._hovered_line, self._lines.first_line, self._lines.last_line}
+        return {line.number for line in lines if line}
+
+    def _get_visible_line_count(self) -> int:
+        """
+        Approximate number of lines fitting in the viewport, ignoring wrapping.
+        """
+        line_height = max(self.fontMetrics().lineSpacing(), 1)
+        return max(self.viewport().height() // line_height, 1)
+
+    def _get_tab_size(self) -> int:
+        """
+        Number of columns of the tabulation character, assuming tab stops of 4.
+        """
+        return max(1, len(self._tab_character.expandtabs(4)))
+
+    def _get_next_visible_block(self, block: QtGui.QTextBlock) -> QtGui.QTextBlock:
+        """
+        First visible block from the given one included, jumping over hidden ranges.
+        """
+        hidden_range = self._hidden_ranges.get_range(block.blockNumber())
+        if hidden_range:
+            block = self.document().findBlockByNumber(hidden_range[1] + 1)
+        # in case the index is out of sync with the blocks
+        while block.isValid() and not block.isVisible():
+            block = block.next()
+        return block
+
+    def _clamp_ranges(self, ranges: Iterable[range]) -> list[tuple[int, int]]:
+        """
+        Convert the given ranges to sorted and merged ``(start, end)`` tuples, with
+        ``end`` included and only valid line numbers.
+        """
+        last_line = self.blockCount() - 1
+        merged: list[list[int]] = []
+
+        for start, end in sorted((_range.start, _range.stop - 1) for _range in ranges):
+            start = max(start, 0)
+            end = min(end, last_line)
+            if end < start:
+                continue
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        return [(start, end) for start, end in merged]
+
+    def _invalidate_lines(self, *args):
+        """
+        Rebuild all the visible lines on next update, when the layout changed.
+        """
+        self._lines_dirty = True
+
+    def _mark_blocks_dirty(self, position: int, last_block: QtGui.QTextBlock):
+        """
+        Ask the document layout to relayout from the given position to the end of
+        the given block. Necessary for a change of visibility to be displayed.
+        """
+        document = self.document()
+        last_position = last_block.position() + last_block.length()
+        last_position = min(last_position, document.characterCount())
+        document.markContentsDirty(position, last_position - position)
+
+    @staticmethod
+    def _lines_to_ranges(lines: Iterable[int]) -> list[range]:
+        return [range(start, end + 1) for start, end in group_lines_as_ranges(lines)]
+
+    def _isolate_ranges(
+        self,
+        visible_ranges: list[tuple[int, int]],
+        start: int,
+        end: int,
+    ):
+        """
+        Between the start and end lines included, make visible only the given ranges.
+
+        Args:
+            visible_ranges: sorted ``(start, end)`` tuples with ``end`` included.
+        """
+        changes = []
+        for visible_start, visible_end in visible_ranges + [(end + 1, end)]:
+            for hidden_range in self._hidden_ranges.gaps_between(
+                start, visible_start - 1
+            ):
+                changes.append((*hidden_range, False))
+            for shown_range in self._hidden_ranges.ranges_between(
+                visible_start, visible_end
+            ):
+                changes.append((*shown_range, True))
+            start = visible_end + 1
+
+        self._set_ranges_visibility(changes)
+
+    def _on_append_timer_timeout(self):
+        """
+        Append all the lines queued with :meth:`append_lines` since the last time,
+        so the document is modified at most once per frame.
+        """
+        lines = self._append_buffer.take()
+        if not lines:
+            self._append_timer.stop()
+            return
+
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum()
+        document = self.document()
+
+        text = "\n".join(lines)
+        # a document ending with a line ending already has an empty last line
+        if document.lastBlock().length() > 1:
+            text = "\n" + text
+
+        # can be already deferred if loading
+        deferred = self._block_count_updates_deferred
+        self._block_count_updates_deferred = True
+        cursor = QtGui.QTextCursor(document)
+        cursor.movePosition(cursor.End)
+        cursor.insertText(text)
+        self._trim_to_maximum_line_count()
+        self._block_count_updates_deferred = deferred
+        self._on_block_count_changed()
+
+        if at_bottom and self._follow_mode:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def _on_lines_queued(self):
+        if not self._append_timer.isActive():
+            self._append_timer.start()
+
+    def _on_block_count_changed(self):
+        """
+        Callback when this block count change.
+        """
+        # will be called once the bulk operation is finished
+        if self._block_count_updates_deferred:
+            return
+
+        renumbered_line = self._renumbered_line
+        self._renumbered_line = None
+
+        # the lines themselves are rebuilt on the next update request
+        sidebar_width = self._sidebar.width()
+        self._update_sidebar_geo()
+        if self._sidebar.width() != sidebar_width:
+            self._update_margins()
+            self._request_repaint()
+            return
+
+        # only the numbers from the first line that moved need to be repainted
+        if renumbered_line is None:
+            return
+        first_line = self._sidebar_lines.get_line_by_number(renumbered_line)
+        if first_line:
+            top = int(self._sidebar_lines.map_geometry(first_line).top())
+            rect = self._sidebar.rect()
+            rect.setTop(top)
+            self._sidebar.request_repaint(rect)
+        elif not self._lines or renumbered_line < self._lines.first_line.number:
+            self._sidebar.request_repaint()
+
+    def _on_contents_changed(self, position: int, removed: int, added: int):
+        """
+        Callback when the text of the document change.
+        """
+        scheduler = self._highlight_scheduler
+        # only the formats changed
+        if scheduler and scheduler.applying:
+            return
+
+        self._invalidate_lines()
+
+        block_count = self.document().blockCount()
+        delta = block_count - self._known_block_count
+        self._known_block_count = block_count
+
+        self._update_find_matches(position, added, delta)
+        if self._block_metadata:
+            self._block_metadata.on_contents_changed(position, added, delta)
+        if scheduler:
+            scheduler.on_contents_changed(position, added, delta)
+
+        if not delta:
+            return
+
+        line = self.document().findBlock(position).blockNumber()
+        if self._renumbered_line is None or line < self._renumbered_line:
+            self._renumbered_line = line
+
+        # keep the hidden ranges in sync with the new block numbers
+        if self._hidden_ranges and not self._trimming and not self._replacing_lines:
+            self._hidden_ranges.shift(line, delta)
+
+    def _on_find_chunk_processed(
+        self,
+        worker: FindWorker,
+        revision: int,
+        last_line: int,
+        matches: list[tuple[int, int, int]],
+    ):
+        """
+        Callback when a find worker found the matches in a chunk of lines.
+        """
+        if worker is not self._find_worker:
+            return
+
+        if self.document().revision() != revision:
+            # search again once the document is not modified anymore
+            self._find_refresh_timer.start()
+            return
+
+        if matches:
+            self._find_index.add_matches(matches)
+            self.find_match_count_changed.emit(len(self._find_index))
+            self._update_find_highlights()
+
+    def _on_find_finished(self, worker: FindWorker):
+        """
+        Callback when a find worker thread stopped, finished or cancelled.
+        """
+        worker.dispose()
+        if worker is not self._find_worker:
+            return
+        self._find_worker = None
+        self.find_finished.emit(len(self._find_index))
+
+    def _on_find_refresh_timeout(self):
+        if self._find_pattern is not None:
+            self.find_text(self._find_pattern)
+
+    def _on_replace_chunk_processed(
+        self,
+        worker: FindWorker,
+        last_line: int,
+        matches: list[tuple],
+    ):
+        if worker is self._replace_worker:
+            self._replace_matches += matches
+
+    def _on_replace_finished(self, worker: FindWorker, revision: int):
+        """
+        Callback when a replace worker thread stopped, finished or cancelled.
+        """
+        worker.dispose()
+        if worker is not self._replace_worker:
+            return
+        self._replace_worker = None
+        matches = self._replace_matches
+        self._replace_matches = []
+
+        if self.document().revision() != revision:
+            LOGGER.warning("Document modified during replace: nothing replaced.")
+            self.replace_finished.emit(0)
+            return
+
+        self._apply_replacements(matches)
+        self.replace_finished.emit(len(matches))
+
+    def _on_line_operation_processed(
+        self,
+        worker: LineOperationWorker,
+        revision: int,
+        ranges: list[tuple[int, int]],
+        chunks: list[list[str]],
+    ):
+        """
+        Callback when a line operation worker computed the new lines.
+        """
+        if worker is not self._line_operation_worker:
+            return
+        self._line_operation_worker = None
+
+        if self.document().revision() != revision:
+            LOGGER.warning("Document modified during line operation: result ignored.")
+            self.line_operation_finished.emit(False)
+            return
+
+        self._replace_line_ranges(ranges, chunks)
+        self.line_operation_finished.emit(True)
+
+    def _on_line_operation_finished(self, worker: LineOperationWorker):
+        """
+        Callback when a line operation worker thread stopped.
+        """
+        worker.dispose()
+        # the result was not emitted
+        if worker is not self._line_operation_worker:
+            return
+        self._line_operation_worker = None
+        if worker.error:
+            LOGGER.error(f"Line operation failed: {worker.error!r}")
+        self.line_operation_finished.emit(False)
+
+    def _on_filter_chunk_processed(
+        self,
+        worker: LineFilterWorker,
+        first_line: int,
+        last_line: int,
+        matches: list[int],
+    ):
+        """
+        Callback when a filter worker found the matching lines in a chunk of lines.
+        """
+        if worker is not self._filter_worker:
+            return
+
+        if self.document().revision() != self._filter_revision:
+            LOGGER.warning("Document modified while being filtered: filter cancelled.")
+            self.cancel_filter()
+            return
+
+        ranges = group_lines_as_ranges(matches)
+        last_line = min(last_line, self.blockCount() - 1)
+        self._isolate_ranges(ranges, first_line, last_line)
+
+        self.filter_progress.emit(last_line + 1, self.blockCount())
+        if matches:
+            self._filter_match_count += len(matches)
+            self.filter_match_count_changed.emit(self._filter_match_count)
+
+    def _on_filter_finished(self, worker: LineFilterWorker):
+        """
+        Callback when a filter worker thread stopped, finished or cancelled.
+        """
+        worker.dispose()
+        if worker is not self._filter_worker:
+            return
+        self._filter_worker = None
+        self.filter_finished.emit(self._filter_match_count)
+
+    def _end_loading(self, success: bool):
+        loader = self._loader
+        self._loader = None
+        self._load_timer.stop()
+        self._block_count_updates_deferred = False
+        loader.cancel()
+        if loader.isFinished():
+            loader.dispose()
+        else:
+            loader.finished.connect(loader.dispose)
+
+        self.document().setUndoRedoEnabled(self._load_undo_enabled)
+        self._on_block_count_changed()
+        self.load_finished.emit(success)
+
+    def _on_load_batch_ready(self, loader: TextLoaderWorker):
+        if loader is self._loader:
+            self._load_timer.start()
+
+    def _on_load_timer_timeout(self):
+        """
+        Append a single batch of the text being loaded, if any is available, so the
+        event loop can process other events between each batch.
+        """
+        batch = self._loader.get_batch()
+        # wait for the loader to signal the next batch
+        if batch is False:
+            self._load_timer.stop()
+            return
+
+        if batch is None:
+            if self._loader.error:
+                LOGGER.error(f"Error while loading text: {self._loader.error}")
+            self._end_loading(success=not self._loader.error)
+            return
+
+        cursor = QtGui.QTextCursor(self.document())
+        cursor.movePosition(cursor.End)
+        cursor.insertText(batch)
+        self.load_progress.emit(self._loader.progress, self._loader.total)
+
+    def _on_huge_file_indexed(self, indexer: HugeFileIndexer, indexed: int, total: int):
+        """
+        Callback when more lines of the huge file are known.
+        """
+        if indexer is not self._huge_file_indexer:
+            return
+
+        self._update_huge_scrollbar_range()
+        self._update_sidebar_geo()
+        self._update_margins()
+
+        # fill the document if the window was smaller than intended
+        window_size = self._get_visible_line_count() + 2 * self._HUGE_FILE_MARGIN
+        if self.blockCount() < window_size:
+            self._rematerialize_timer.start()
+
+        self.huge_file_progress.emit(indexed, total)
+
+    def _on_huge_scrollbar_changed(self, value: int):
+        """
+        Callback when the scrollbar representing the whole huge file is moved.
+        """
+        if not self._huge_file or self._materializing:
+            return
+
+        window_start = self._line_number_offset
+        window_end = window_start + self.blockCount()
+        bottom_line = value + self._get_visible_line_count()
+        if window_start <= value and bottom_line <= window_end:
+            self.verticalScrollBar().setValue(value - window_start)
+        else:
+            self._materialize_huge_file(value)
+
+    def _on_hover_event(self, leaving: bool = False):
+        """
+        Hover is the most often triggered event, so it has its own method for
+        performance optimisations. Only the previous and new hovered lines are
+        repainted.
+        """
+        if self._reduced_styling:
+            return
+
+        hovered_line = None
+        if not leaving:
+            cursor_position = self.mapFromGlobal(self.cursor().pos())
+            hovered_line = self._lines.get_line_from_position(cursor_position)
+
+        previous_line = self._hovered_line
+        if hovered_line is previous_line:
+            return
+
+        self._hovered_line = hovered_line
+
+        for line in (previous_line, hovered_line):
+            if line:
+                line.hovered = line is hovered_line
+                self._update_line(line)
+
+    def _on_jump_to_line(self):
+        # all the lines of a huge file can be jumped to
+        first_line = 1 if self._huge_file else self._line_number_offset + 1
+        dialog = JumpToLineDialog(
+            max_lines=self._get_last_line_number(),
+            first_line=first_line,
+        )
+        result = dialog.exec_()
+        if result != dialog.Accepted:
+            return
+
+        line_number = dialog.line_number - 1
+        if not self._huge_file:
+            line_number = max(line_number - self._line_number_offset, 0)
+        self.jump_to_line(line_number)
+
+    def _on_vertical_scroll_changed(self, value: int):
+        """
+        Callback when the document is scrolled.
+        """
+        if self._reduced_scroll_speed:
+            now = time.perf_counter()
+            last_time, last_value = self._last_scroll
+            self._last_scroll = (now, value)
+            speed = abs(value - last_value) / max(now - last_time, 0.001)
+            if speed >= self._reduced_scroll_speed:
+                self._fast_scrolling = True
+                self._update_reduced_styling()
+            if self._fast_scrolling:
+                self._scroll_idle_timer.start()
+
+        if not self._huge_file or self._materializing:
+            return
+
+        top_line = self._line_number_offset + value
+        self._huge_scrollbar.blockSignals(True)
+        self._huge_scrollbar.setValue(top_line)
+        self._huge_scrollbar.blockSignals(False)
+
+        # replace the window of lines when getting close to its edges
+        threshold = self._HUGE_FILE_MARGIN // 4
+        window_end = self._line_number_offset + self.blockCount()
+        bottom_line = top_line + self._get_visible_line_count()
+        if (value < threshold and self._line_number_offset > 0) or (
+            bottom_line + threshold > window_end
+            and window_end < self._huge_file.line_count
+        ):
+            # not while Qt is still processing the scroll
+            self._rematerialize_timer.start()
+
+    def _on_selection_changed(self):
+        """
+        Callback when this text cursor change.
+        """
+        if self._updating_selection:
+            return
+
+        # the cursor was moved by other means than the sidebar
+        if self._sidebar.selection:
+            self._sidebar.selection.clear()
+            self._update_sidebar_selection()
+
+        self._update_lines()
+        self._update_sidebar()
+        self._request_repaint()
+
+    def _on_sidebar_auto_scroll(self, lines: int):
+        scrollbar = self.verticalScrollBar()
+        scrollbar.setValue(scrollbar.value() + lines)
+        # lines are usually already updated from the update request
+        self._update_lines()
+        self._update_sidebar(repaint=False)
+
+    def _on_sidebar_selection_changed(self):
+        """
+        Propagate the range of line selected in the sidebar to this text cursor.
+        """
+        self._updating_selection = True
+        self._update_sidebar_selection()
+
+        active_range = self._sidebar.selection.active_range
+
+        if not active_range:
+            self._updating_selection = False
+            self._on_selection_changed()
+            return
+
+        start, end = active_range
+        document = self.document()
+        cursor = QtGui.QTextCursor(document.findBlockByNumber(start))
+        end_block = document.findBlockByNumber(end)
+        cursor.setPosition(
+            end_block.position() + end_block.length() - 1,
+            cursor.KeepAnchor,
+        )
+
+        self.setTextCursor(cursor)
+
+        scrollbar_h = self.horizontalScrollBar()
+        scrollbar_h.setSliderPosition(scrollbar_h.minimum())
+
+        self._updating_selection = False
+
+    def _on_sidebar_width_changed(self):
+        self._update_sidebar_geo()
+        self._update_margins()
+
+    def _on_scroll_idle(self):
+        self._fast_scrolling = False
+        self._update_reduced_styling()
+
+    def _on_update_requested(self, rect: QtCore.QRect, dy: int):
+        """
+        Callback when the viewport was updated or scrolled of ``dy`` pixels.
+        """
+        moved_lines = self._get_viewport_dependent_lines() if dy else set()
+        rebuilt = self._update_lines()
+        self._update_highlighting()
+        self._update_sidebar_selection()
+        self._update_find_highlights()
+        scroll_only = dy and not rebuilt
+        if rebuilt and self._update_reduced_styling():
+            scroll_only = False
+
+        start_time = self._instrumentation.start()
+        self._update_sidebar(repaint=not scroll_only)
+        self._instrumentation.stop("update_sidebar", start_time, len(self._lines))
+
+        if not scroll_only:
+            self._request_repaint()
+            return
+
+        self._sidebar.scroll_lines(dy)
+        moved_lines.update(self._get_viewport_dependent_lines())
+        for line_number in moved_lines:
+            text_line = self._lines.get_line_by_number(line_number)
+            if text_line:
+                self._update_line(text_line)
+
+    def _build_lines(self, reuse: bool):
+        """
+        Fill the buffer of visible lines by iterating over the visible blocks.
+
+        Args:
+            reuse: True to shift the lines already built instead of rebuilding them.
+        """
+        start_time = self._instrumentation.start()
+        previous_lines = self._lines
+        viewport_height = self.viewport().height()
+        content_offset = self.contentOffset()
+        block = self.firstVisibleBlock()
+
+        # offset between the previous lines geometry and the new one
+        shift: Optional[QtCore.QPointF] = None
+        if reuse:
+            first_line = previous_lines.get_line_by_number(block.blockNumber())
+            if first_line:
+                block_geo = self.blockBoundingGeometry(block)
+                block_geo = block_geo.translated(content_offset)
+                shift = block_geo.topLeft() - first_line.geometry.topLeft()
+
+        self._lines = TextLineBuffer()
+        text_line: Optional[TextLine] = None
+        first_block = True
+
+        while True:
+            block = self._get_next_visible_block(block)
+            if not block.isValid():
+                break
+
+            block_number = block.blockNumber()
+
+            text_line = None
+            if shift is not None:
+                text_line = previous_lines.get_line_by_number(block_number)
+
+            if text_line:
+                text_line.geometry.translate(shift)
+                self._lines_stats["reused"] += 1
+            else:
+                block_geo = self.blockBoundingGeometry(block)
+                block_geo = block_geo.translated(content_offset)
+                text_line = TextLine(
+                    number=block_number,
+                    geometry=block_geo,
+                    hovered=False,
+                    selected=False,
+                    position=QtWidgets.QStyleOptionViewItem.Invalid,
+                    pressed=False,
+                    alternate=bool(block_number % 2),
+                )
+                self._lines_stats["rebuilt"] += 1
+
+            if first_block:
+                text_line.position = QtWidgets.QStyleOptionViewItem.Beginning
+            else:
+                text_line.position = QtWidgets.QStyleOptionViewItem.Invalid
+
+            self._lines.add_line(text_line)
+
+            first_block = False
+            if text_line.geometry.bottom() >= viewport_height:
+                break
+            block = block.next()
+
+        if len(self._lines) > 1:
+            text_line.position = QtWidgets.QStyleOptionViewItem.End
+
+        self._instrumentation.stop("build_lines", start_time, len(self._lines))
+
+    def _materialize_huge_file(self, top_line: int):
+        """
+        Load the lines of the huge file around the given line and scroll to it.
+        """
+        index = self._huge_file
+        visible_count = self._get_visible_line_count()
+        window_size = visible_count + 2 * self._HUGE_FILE_MARGIN
+        top_line = max(min(top_line, index.line_count - visible_count), 0)
+        start = top_line - self._HUGE_FILE_MARGIN
+        start = max(min(start, index.line_count - window_size), 0)
+
+        # keep the cursor at the same place in the file if possible
+        cursor = self.textCursor()
+        cursor_line = cursor.blockNumber() + self._line_number_offset
+        cursor_column = cursor.positionInBlock()
+
+        self._materializing = True
+        self.setPlainText(index.read_text(start, window_size))
+        self._line_number_offset = start
+        self._sidebar.set_line_number_offset(start)
+
+        if start <= cursor_line < start + self.blockCount():
+            block = self.document().findBlockByNumber(cursor_line - start)
+            cursor = QtGui.QTextCursor(block)
+            cursor_column = min(cursor_column, block.length() - 1)
+            cursor.setPosition(block.position() + cursor_column)
+            self.setTextCursor(cursor)
+
+        self.verticalScrollBar().setValue(top_line - start)
+        self._huge_scrollbar.setValue(top_line)
+        self._materializing = False
+
+        self._update_sidebar_geo()
+        self._update_margins()
+
+    def _rematerialize_huge_file(self):
+        """
+        Replace the document content with the lines of the huge file around the
+        current top line.
+        """
+        if self._huge_file:
+            top_line = self._line_number_offset + self.verticalScrollBar().value()
+            self._materialize_huge_file(top_line)
+
+    def _apply_replacements(self, matches: list[tuple]):
+        """
+        Replace all the given matches in a single edit.
+        """
+        if not matches:
+            return
+
+        document = self.document()
+        cursor = QtGui.QTextCursor(document)
+        self._replacing_lines = True
+        self._updating_selection = True
+        cursor.beginEditBlock()
+
+        # from the bottom so the positions above stay valid
+        block = QtGui.QTextBlock()
+        for line, column, length, text, _ in reversed(matches):
+            if not block.isValid() or block.blockNumber() != line:
+                block = document.findBlockByNumber(line)
+            position = block.position() + column
+            cursor.setPosition(position)
+            cursor.setPosition(position + length, cursor.KeepAnchor)
+            cursor.insertText(text)
+
+        cursor.endEditBlock()
+        self._updating_selection = False
+        self._replacing_lines = False
+
+        # renumber the hidden lines when replacements added or removed lines
+        for line, _, _, _, line_delta in reversed(matches):
+            if line_delta and self._hidden_ranges:
+                self._hidden_ranges.shift(line, line_delta)
+
+        self._invalidate_lines()
+        self._update_lines()
+        self._update_sidebar()
+        self._request_repaint()
+
+    def _get_visible_match(self, index: Optional[int], forward: bool) -> Optional[int]:
+        """
+        Index of the next match not on a hidden line, wrapping around once.
+        """
+        if not len(self._find_index):
+            return None
+        for _ in range(2):
+            while index is not None:
+                line = self._find_index.get_match(index)[0]
+                if line not in self._hidden_ranges:
+                    return index
+                if forward:
+                    line = self._hidden_ranges.next_outside(line)
+                    index = self._find_index.get_next_index(line, -1)
+                else:
+                    line = self._hidden_ranges.previous_outside(line)
+                    index = self._find_index.get_previous_index(line + 1, 0)
+            index = 0 if forward else len(self._find_index) - 1
+        return None
+
+    def _select_match(self, index: int):
+        line, column, length = self._find_index.get_match(index)
+        block = self.document().findBlockByNumber(line)
+        cursor = QtGui.QTextCursor(block)
+        cursor.setPosition(block.position() + column)
+        cursor.setPosition(block.position() + column + length, cursor.KeepAnchor)
+        self.setTextCursor(cursor)
+        self.ensureCursorVisible()
+
+    def _replace_line_ranges(
+        self,
+        ranges: list[tuple[int, int]],
+        chunks: list[list[str]],
+    ):
+        """
+        Replace each range of visible lines with the given lines, in a single edit.
+        """
+        document = self.document()
+        cursor = QtGui.QTextCursor(document)
+        self._replacing_lines = True
+        self._updating_selection = True
+        cursor.beginEditBlock()
+
+        # from the bottom so the block numbers above stay valid
+        for (start, end), lines in reversed(list(zip(ranges, chunks))):
+            first_block = document.findBlockByNumber(start)
+            last_block = document.findBlockByNumber(end)
+            start_position = first_block.position()
+            end_position = last_block.position() + last_block.length() - 1
+            # removing all the lines also requires to remove one line ending
+            if not lines and last_block.next().isValid():
+                end_position = last_block.next().position()
+            elif not lines and start > 0:
+                previous_block = first_block.previous()
+                start_position = previous_block.position() + previous_block.length()
+                start_position -= 1
+            cursor.setPosition(start_position)
+            cursor.setPosition(end_position, cursor.KeepAnchor)
+            cursor.insertText("\n".join(lines))
+
+        cursor.endEditBlock()
+        self._updating_selection = False
+        self._replacing_lines = False
+
+        # renumber hidden lines of the line count difference of the ranges above
+        hidden_ranges = LineRangeSet()
+        # first line number of each range in the new document
+        new_starts = []
+        range_index = 0
+        shift = 0
+        for hidden_start, hidden_end in self._hidden_ranges:
+            while range_index < len(ranges) and ranges[range_index][1] < hidden_start:
+                start, end = ranges[range_index]
+                new_starts.append(start + shift)
+                shift += len(chunks[range_index]) - (end - start + 1)
+                range_index += 1
+            hidden_ranges.add(hidden_start + shift, hidden_end + shift)
+        for start, end in ranges[range_index:]:
+            new_starts.append(start + shift)
+            shift += len(chunks[range_index]) - (end - start + 1)
+            range_index += 1
+        self._hidden_ranges = hidden_ranges
+
+        # blocks merged or split at the edges of the edits may have the wrong state
+        for new_start, lines in zip(new_starts, chunks):
+            for line in (new_start - 1, new_start, new_start + len(lines)):
+                block = document.findBlockByNumber(line)
+                if not block.isValid():
+                    continue
+                visible = line not in hidden_ranges
+                if block.isVisible() != visible:
+                    block.setVisible(visible)
+                    document.markContentsDirty(block.position(), block.length())
+
+        self._sidebar.selection.clear()
+        self._invalidate_lines()
+        self._update_lines()
+        self._update_sidebar()
+        self._request_repaint()
+
+    def _request_repaint(self, rect: Optional[QtCore.QRect] = None):
+        """
+        Schedule a repaint of the given viewport area, or the whole viewport if None.
+        """
+        self._repaint_scheduler.request(self.viewport(), rect)
+
+    def _start_loading(self, loader: TextLoaderWorker):
+        self.cancel_load()
+        self.cancel_filter()
+        self.setPlainText("")
+
+        # avoid storing each batch in the undo stack, like setPlainText
+        self._load_undo_enabled = self.document().isUndoRedoEnabled()
+        self.document().setUndoRedoEnabled(False)
+
+        self._loader = loader
+        self._block_count_updates_deferred = True
+        loader.batch_ready.connect(functools.partial(self._on_load_batch_ready, loader))
+        loader.start()
+
+    def _set_ranges_visibility(self, changes: list[tuple[int, int, bool]]):
+        """
+        Change the visibility of the given ``(start, end, visible)`` ranges of blocks,
+        then relayout only the modified part of the document.
+        """
+        if not changes:
+            return
+
+        start_time = self._instrumentation.start()
+        changes.sort()
+        document = self.document()
+        block = document.findBlockByNumber(changes[0][0])
+        block_number = changes[0][0]
+        # first position of the span of blocks to relayout
+        dirty_position = block.position()
+
+        for start, end, visible in changes:
+            if start == block_number + 1:
+                block = block.next()
+            elif start != block_number:
+                if start - block_number > self._DIRTY_SPAN_MAX_GAP:
+                    # avoid relayouting a big unchanged area in between
+                    self._mark_blocks_dirty(dirty_position, block)
+                    block = document.findBlockByNumber(start)
+                    dirty_position = block.position()
+                else:
+                    block = document.findBlockByNumber(start)
+            block_number = start
+
+            while True:
+                block.setVisible(visible)
+                if block_number >= end:
+                    break
+                block = block.next()
+                block_number += 1
+
+            if visible:
+                self._hidden_ranges.remove(start, end)
+            else:
+                self._hidden_ranges.add(start, end)
+
+        self._mark_blocks_dirty(dirty_position, block)
+        self._invalidate_lines()
+        self._request_repaint()
+        self._instrumentation.stop(
+            "set_ranges_visibility",
+            start_time,
+            sum(end - start + 1 for start, end, _ in changes),
+        )
+
+    def _trim_to_maximum_line_count(self):
+        """
+        Remove the lines at the top of the document exceeding the maximum line count.
+        """
+        excess = self.blockCount() - self._maximum_line_count
+        if not self._maximum_line_count or excess <= 0:
+            return
+
+        document = self.document()
+        cursor = QtGui.QTextCursor(document)
+        first_kept_block = document.findBlockByNumber(excess)
+        cursor.setPosition(first_kept_block.position(), cursor.KeepAnchor)
+        # Qt discards the metadata of the first kept block with the removed ones
+        flags = 0
+        if self._block_metadata:
+            flags = self._block_metadata.get_metadata(excess).flags
+
+        self._trimming = True
+        cursor.removeSelectedText()
+        self._trimming = False
+
+        # the first block is kept by Qt and receive the first remaining line content
+        self._hidden_ranges.shift(-1, -excess)
+        document.firstBlock().setVisible(0 not in self._hidden_ranges)
+        if self._block_metadata:
+            self._block_metadata.set_flags(0, flags)
+
+        self._line_number_offset += excess
+        self._sidebar.set_line_number_offset(self._line_number_offset)
+
+    def _update_huge_scrollbar_geo(self):
+        rect = self.contentsRect()
+        width = self._huge_scrollbar.sizeHint().width()
+        self._huge_scrollbar.setGeometry(
+            rect.right() - width + 1,
+            rect.top(),
+            width,
+            rect.height(),
+        )
+
+    def _update_huge_scrollbar_range(self):
+        visible_count = self._get_visible_line_count()
+        self._huge_scrollbar.setPageStep(visible_count)
+        self._huge_scrollbar.setMaximum(
+            max(self._huge_file.line_count - visible_count, 0)
+        )
+
+    def _update_lines(self) -> bool:
+        """
+        Update the buffer of visible lines.
+
+        Returns:
+            True if the lines were entirely rebuilt.
+        """
+        start_time = self._instrumentation.start()
+        viewport_size = self.viewport().size()
+        content_offset = self.contentOffset()
+        scroll_key = (
+            self.firstVisibleBlock().blockNumber(),
+            content_offset.x(),
+            content_offset.y(),
+        )
+
+        rebuilt = self._lines_dirty or viewport_size != self._lines_viewport_size
+        if rebuilt:
+            self._build_lines(reuse=False)
+            self._lines_stats["full_updates"] += 1
+        elif scroll_key != self._lines_scroll_key:
+            self._build_lines(reuse=True)
+            self._lines_stats["scroll_updates"] += 1
+        else:
+            self._lines_stats["state_updates"] += 1
+
+        self._lines_dirty = False
+        self._lines_scroll_key = scroll_key
+        self._lines_viewport_size = viewport_size
+        self._update_lines_state()
+        self._instrumentation.stop("update_lines", start_time, len(self._lines))
+        return rebuilt
+
+    def _update_lines_state(self):
+        """
+        Update the hovered, pressed and selected state of the visible lines.
+        """
+        start_time = self._instrumentation.start()
+        hovered_line = None
+        if not self._reduced_styling:
+            cursor_position = self.mapFromGlobal(self.cursor().pos())
+            hovered_line = self._lines.get_line_from_position(cursor_position)
+        selection_start = self.selected_lines_start
+        selection_end = self.selected_lines_end
+        sidebar_selection = self._sidebar.selection
+
+        self._hovered_line = hovered_line
+
+        for line in self._lines:
+            line.hovered = line is hovered_line
+            line.pressed = line.hovered and self._mouse_pressed
+            line.selected = selection_start <= line.number <= selection_end or (
+                bool(sidebar_selection) and line.number in sidebar_selection
+            )
+
+        self._instrumentation.stop("update_lines_state", start_time, len(self._lines))
+
+    def _update_line(self, text_line: TextLine):
+        """
+        Schedule a repaint of only the area of the given line, in this widget and in
+        the sidebar.
+        """
+        self._request_repaint(text_line.geometry.toAlignedRect())
+        self._sidebar.update_line(text_line)
+
+    def _update_margins(self):
+        current_margins = self.viewportMargins()
+        sidebar_width = self._sidebar.get_intended_width(self._get_last_line_number())
+        left_margin = sidebar_width + self._left_margin
+        # setting the margins relayout the viewport even if they didn't change
+        if left_margin == current_margins.left():
+            return
+        self.setViewportMargins(
+            left_margin,
+            current_margins.top(),
+            current_margins.right(),
+            current_margins.bottom(),
+        )
+
+    def _update_reduced_styling(self) -> bool:
+        """
+        Switch the per-line items painting, True if the mode changed.
+        """
+        reduced = self._fast_scrolling
+        if self._reduced_visible_lines:
+            reduced = reduced or len(self._lines) >= self._reduced_visible_lines
+        if self._reduced_document_lines:
+            line_count = self._get_document_line_count()
+            reduced = reduced or line_count >= self._reduced_document_lines
+
+        if reduced == self._reduced_styling:
+            return False
+
+        self._reduced_styling = reduced
+        if reduced and self._hovered_line:
+            self._hovered_line.hovered = False
+            self._hovered_line = None
+        self._sidebar.set_item_backgrounds_enabled(not reduced)
+        self._request_repaint()
+        self.reduced_styling_changed.emit(reduced)
+        return True
+
+    def _update_highlighting(self):
+        """
+        Highlight the visible lines and the ones around them, if not already.
+        """
+        scheduler = self._highlight_scheduler
+        # applying the formats request an update of the viewport
+        if not scheduler or scheduler.applying or not self._lines:
+            return
+
+        start_time = self._instrumentation.start()
+        margin = self._HIGHLIGHT_MARGIN
+        last_number = self.document().blockCount() - 1
+        visible_ranges = group_lines_as_ranges(line.number for line in self._lines)
+        for start, end in visible_ranges:
+            scheduler.highlight_blocks(
+                max(0, start - margin),
+                min(end + margin, last_number),
+            )
+        self._instrumentation.stop("update_highlighting", start_time)
+
+    def _update_sidebar_selection(self):
+        """
+        Display the ranges selected in the sidebar, other than the one being
+        selected, as extra selections limited to the visible lines.
+        """
+        first_line = self._lines.first_line
+        last_line = self._lines.last_line
+        ranges = []
+        if first_line and self._sidebar.selection:
+            ranges = self._sidebar.selection.get_ranges_between(
+                first_line.number,
+                last_line.number,
+                include_active=False,
+            )
+
+        key = tuple(ranges)
+        if key == self._sidebar_selection_key:
+            return
+        self._sidebar_selection_key = key
+
+        palette = self.palette()
+        text_format = QtGui.QTextCharFormat()
+        text_format.setBackground(palette.highlight())
+        text_format.setForeground(palette.highlightedText())
+        text_format.setProperty(QtGui.QTextFormat.FullWidthSelection, True)
+
+        document = self.document()
+        extra_selections = []
+        for start, end in ranges:
+            end_block = document.findBlockByNumber(end)
+            cursor = QtGui.QTextCursor(document.findBlockByNumber(start))
+            cursor.setPosition(
+                end_block.position() + end_block.length() - 1,
+                cursor.KeepAnchor,
+            )
+            extra_selection = QtWidgets.QTextEdit.ExtraSelection()
+            extra_selection.cursor = cursor
+            extra_selection.format = text_format
+            extra_selections.append(extra_selection)
+
+        self._set_extra_selections("sidebar_selection", extra_selections)
+
+    def _set_extra_selections(
+        self,
+        name: str,
+        extra_selections: list[QtWidgets.QTextEdit.ExtraSelection],
+    ):
+        """
+        Replace the extra selections of the given feature, keeping the others.
+        """
+        self._extra_selections[name] = extra_selections
+        self.setExtraSelections(
+            [
+                extra_selection
+                for selections in self._extra_selections.values()
+                for extra_selection in selections
+            ]
+        )
+
+    def _update_find_highlights(self):
+        """
+        Highlight the matches of the current search on the visible lines only, and
+        mark their lines in the sidebar.
+        """
+        first_line = self._lines.first_line
+        last_line = self._lines.last_line
+        matches = []
+        if first_line and len(self._find_index):
+            matches = self._find_index.get_matches_between(
+                first_line.number,
+                last_line.number,
+            )
+
+        key = tuple(matches)
+        if key == self._find_highlight_key:
+            return
+        self._find_highlight_key = key
+
+        color = self.palette().highlight().color()
+        color.setAlpha(100)
+        text_format = QtGui.QTextCharFormat()
+        text_format.setBackground(color)
+
+        document = self.document()
+        extra_selections = []
+        block = QtGui.QTextBlock()
+        for line, column, length in matches:
+            if not block.isValid() or block.blockNumber() != line:
+                block = document.findBlockByNumber(line)
+            cursor = QtGui.QTextCursor(block)
+            cursor.setPosition(block.position() + column)
+            cursor.setPosition(block.position() + column + length, cursor.KeepAnchor)
+            extra_selection = QtWidgets.QTextEdit.ExtraSelection()
+            extra_selection.cursor = cursor
+            extra_selection.format = text_format
+            extra_selections.append(extra_selection)
+
+        self._set_extra_selections("find", extra_selections)
+        self._sidebar.set_marked_lines({match[0] for match in matches})
+
+    def _update_find_matches(self, position: int, added: int, block_delta: int):
+        """
+        Search again only the lines modified since the last search.
+        """
+        if self._find_pattern is None:
+            return
+
+        document = self.document()
+        block = document.findBlock(position)
+        first_line = block.blockNumber()
+        # a change up to the end of the document ends after its last character
+        end = min(position + added, document.characterCount() - 1)
+        last_line = document.findBlock(end).blockNumber()
+        # the matches of a search in progress are already outdated
+        if self._find_worker or last_line - first_line > self._FIND_UPDATE_MAX_LINES:
+            self._find_refresh_timer.start()
+            return
+
+        lines = []
+        while block.isValid() and block.blockNumber() <= last_line:
+            lines.append(block.text())
+            block = block.next()
+        matches = find_in_lines(lines, first_line, self._find_pattern)
+
+        match_count = len(self._find_index)
+        self._find_index.replace_lines(
+            first_line,
+            last_line - block_delta,
+            block_delta,
+            matches,
+        )
+        if len(self._find_index) != match_count:
+            self.find_match_count_changed.emit(len(self._find_index))
+
+    def _update_sidebar(self, repaint: bool = True):
+        """
+        Updates lines displayed in the sidebar.
+        """
+        # take in account padding from style
+        top_margin = self.rect().top() - self.contentsRect().top()
+        self._sidebar_lines.buffer = self._lines
+        self._sidebar_lines.x = 0
+        self._sidebar_lines.width = self._sidebar.width()
+        self._sidebar_lines.top_offset = -top_margin
+        self._sidebar.set_line_buffer(self._sidebar_lines, repaint=repaint)
+
+    def _update_sidebar_geo(self):
+        geometry = QtCore.QRect(
+            0,
+            0,
+            self._sidebar.get_intended_width(self._get_last_line_number()),
+            self.height(),
+        )
+        if geometry != self._sidebar.geometry():
+            self._sidebar.setGeometry(geometry)
+
+    def _edit_line_ranges(
+        self,
+        ranges: list[tuple[int, int]],
+        edit: Callable[[QtGui.QTextCursor, QtGui.QTextBlock], None],
+    ):
+        """
+        Call ``edit(cursor, block)`` on each block of the ranges, in a single edit.
+        """
+        document = self.document()
+        cursor = QtGui.QTextCursor(document)
+        # the text cursor moving must not drop the sidebar selection
+        self._updating_selection = True
+        cursor.beginEditBlock()
+
+        for start, end in ranges:
+            block = document.findBlockByNumber(start)
+            for _ in range(end - start + 1):
+                if not block.isValid():
+                    break
+                edit(cursor, block)
+                block = block.next()
 
-        # generate event on hovering
-        self.setAttribute(QtCore.Qt.WA_Hover, True)
+        cursor.endEditBlock()
+        self._updating_selection = False
+        self._update_lines()
+        self._update_sidebar()
+        self._request_repaint()
 
-        self.updateRequest.connect(self._on_update_requested)
-        self.blockCountChanged.connect(self._on_block_count_changed)
-        self.cursorPositionChanged.connect(self._on_selection_changed)
-        self._sidebar.line_selection_changed.connect(self._on_sidebar_selection_changed)
+    def _get_selected_line_ranges(self) -> list[tuple[int, int]]:
+        """
+        Ranges of lines selected with the text cursor and in the sidebar, merged and
+        sorted, ``end`` included.
+        """
+        ranges = LineRangeSet()
+        ranges.add(self.selected_lines_start, self.selected_lines_end)
+        for start, end in self._sidebar.selection:
+            ranges.add(start, end)
+        return list(ranges)
+
+    def _indent_block(self, cursor: QtGui.QTextCursor, block: QtGui.QTextBlock):
+        cursor.setPosition(block.position())
+        cursor.insertText(self._tab_character)
+
+    def _unindent_block(self, cursor: QtGui.QTextCursor, block: QtGui.QTextBlock):
+        if not block.text().startswith(self._tab_character):
+            return
+        cursor.setPosition(block.position())
+        cursor.setPosition(
+            block.position() + len(self._tab_character), cursor.KeepAnchor
+        )
+        cursor.removeSelectedText()
 
-        self._update_margins()
+    def _indent_selection(self):
+        cursor = self.textCursor()
+        if not cursor.hasSelection() and not self._sidebar.selection:
+            cursor.insertText(self._tab_character)
+            self.setTextCursor(cursor)
+            return
+        self._edit_line_ranges(self._get_selected_line_ranges(), self._indent_block)
 
-    @property
-    def selected_lines_start(self) -> int:
+    def _unindent_selection(self):
+        self._edit_line_ranges(self._get_selected_line_ranges(), self._unindent_block)
+
+    def jump_to_line(self, line_number: int):
         """
-        Line number of the beginning of the selection
+        Set the cursor (and the viewport) active on the given line number.
+
+        If the line is hidden, jump to the first visible line after it instead.
         """
-        cursor = self.textCursor()
-        start = cursor.selectionStart()
-        cursor.setPosition(start)
-        return cursor.blockNumber()
+        if self._huge_file:
+            line_number = max(min(line_number, self._huge_file.line_count - 1), 0)
+            window_start = self._line_number_offset
+            if not window_start <= line_number < window_start + self.blockCount():
+                self._materialize_huge_file(
+                    line_number - self._get_visible_line_count() // 2
+                )
+            line_number -= self._line_number_offset
+
+        line_number = max(min(line_number, self.blockCount() - 1), 0)
+        visible_line = self._hidden_ranges.next_outside(line_number)
+        if visible_line >= self.blockCount():
+            visible_line = self._hidden_ranges.previous_outside(line_number)
+
+        if visible_line < 0:
+            LOGGER.warning(f"Cannot jump to line {line_number}: all lines are hided.")
+            return
+        if visible_line != line_number:
+            LOGGER.debug(
+                f"Line {line_number} is hided: jumping to line {visible_line} instead."
+            )
 
-    @property
-    def selected_lines_end(self) -> int:
+        block = self.document().findBlockByNumber(visible_line)
+        cursor = QtGui.QTextCursor(block)
+        self.setTextCursor(cursor)
+
+    def reset_lines_update_stats(self):
         """
-        Line number of the end of the selection
+        Reset the counters returned by :attr:`lines_update_stats` to zero.
         """
-        cursor = self.textCursor()
-        end = cursor.selectionEnd()
-        cursor.setPosition(end)
-        return cursor.blockNumber()
+        self._lines_stats = {
+            "rebuilt": 0,
+            "reused": 0,
+            "full_updates": 0,
+            "scroll_updates": 0,
+            "state_updates": 0,
+        }
+
+    def close_huge_file(self):
+        """
+        Stop displaying the file opened with :meth:`open_huge_file` and clear the
+        document.
+        """
+        if not self._huge_file:
+            return
 
-    def _get_last_visible_block(self) -> QtGui.QTextBlock:
+        self._rematerialize_timer.stop()
+        self._huge_file_indexer.cancel()
+        # the file must not be read anymore before being closed
+        self._huge_file_indexer.wait()
+        self._huge_file_indexer.dispose()
+        self._huge_file_indexer = None
+        self._huge_file.close()
+        self._huge_file = None
+
+        read_only, wrap_mode, scrollbar_policy = self._huge_file_previous_state
+        self.setReadOnly(read_only)
+        self.setLineWrapMode(wrap_mode)
+        self.setVerticalScrollBarPolicy(scrollbar_policy)
+        self._huge_scrollbar.hide()
+        margins = self.viewportMargins()
+        self.setViewportMargins(
+            margins.left(),
+            margins.top(),
+            margins.right() - self._huge_scrollbar.width(),
+            margins.bottom(),
+        )
+        self.setPlainText("")
+
+    def open_huge_file(
+        self,
+        path: Union[str, Path],
+        encoding: str = "utf-8",
+        errors: str = "replace",
+    ):
         """
-        The bottom most block in the viewport.
+        Display the given file in read-only mode, without loading it in memory.
+
+        Only the lines around the viewport are put in the document.
         """
-        bottom_right = QtCore.QPoint(
-            self.viewport().width() - 1, self.viewport().height() - 1
+        self.close_huge_file()
+        self.cancel_load()
+        self.cancel_filter()
+
+        self._huge_file = HugeFileIndex(path, encoding, errors)
+        indexer = HugeFileIndexer(self._huge_file, parent=self)
+        indexer.progress_changed.connect(
+            functools.partial(self._on_huge_file_indexed, indexer)
         )
-        return self.cursorForPosition(bottom_right).block()
+        self._huge_file_indexer = indexer
 
-    def _on_block_count_changed(self):
+        self._huge_file_previous_state = (
+            self.isReadOnly(),
+            self.lineWrapMode(),
+            self.verticalScrollBarPolicy(),
+        )
+        self.setReadOnly(True)
+        # so a block is always a single line
+        self.setLineWrapMode(self.NoWrap)
+        self.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+        margins = self.viewportMargins()
+        self.setViewportMargins(
+            margins.left(),
+            margins.top(),
+            margins.right() + self._huge_scrollbar.sizeHint().width(),
+            margins.bottom(),
+        )
+        self._update_huge_scrollbar_geo()
+        self._huge_scrollbar.setValue(0)
+        self._huge_scrollbar.show()
+
+        self._materialize_huge_file(0)
+        indexer.start()
+
+    def set_alternating_row_colors(self, enable: bool):
         """
-        Callback when this block count change.
+        True to allow alternating rows to have a different color if it was defined
+        in the style.
         """
-        self._update_lines()
-        self._update_sidebar()
-        self._update_sidebar_geo()
-        self._update_margins()
-        self.repaint()
+        self._alternating_row_colors = enable
+        self._sidebar.set_alternating_row_colors(enable)
 
-    def _on_hover_event(self):
+    def set_performance_profile(
+        self,
+        scroll_speed: float = 0,
+        visible_lines: int = 0,
+        document_lines: int = 0,
+        idle_delay: int = 200,
+    ):
         """
-        Hover is the most often triggered event, so it has its own method for
-        performance optimisations.
-        """
-        cursor_position = self.mapFromGlobal(self.cursor().pos())
+        Configure from when the per-line styling and the hover are disabled.
 
-        for line in self._lines:
-            line.hovered = line.geometry.contains(cursor_position)
+        Args:
+            scroll_speed: lines scrolled per second, 0 to never disable.
+            visible_lines: number of visible lines, 0 to never disable.
+            document_lines: number of lines in the document, 0 to never disable.
+            idle_delay: milliseconds without scrolling to consider it stopped.
+        """
+        self._reduced_scroll_speed = scroll_speed
+        self._reduced_visible_lines = visible_lines
+        self._reduced_document_lines = document_lines
+        self._scroll_idle_timer.setInterval(idle_delay)
+        if not scroll_speed:
+            self._fast_scrolling = False
+        self._update_reduced_styling()
+
+    def set_block_metadata_enabled(self, enabled: bool):
+        """
+        Keep the length, indentation and flags of each line, see :attr:`block_metadata`.
+        """
+        if enabled == bool(self._block_metadata):
+            return
 
-    def _on_jump_to_line(self):
-        dialog = JumpToLineDialog(max_lines=self.blockCount())
-        result = dialog.exec_()
-        if result != dialog.Accepted:
+        if not enabled:
+            self._block_metadata.clear()
+            self._block_metadata.deleteLater()
+            self._block_metadata = None
             return
-        self.jump_to_line(dialog.line_number - 1)
 
-    def _on_selection_changed(self):
+        self._block_metadata = BlockMetadataCache(
+            self.document(),
+            tab_size=self._get_tab_size(),
+            parent=self,
+        )
+
+    def set_highlighter(self, highlighter: Optional[LazyHighlighter]):
         """
-        Callback when this text cursor change.
+        Set how the document text is highlighted, the visible lines first.
         """
-        if self._updating_selection:
+        if self._highlight_scheduler:
+            self._highlight_scheduler.clear()
+            self._highlight_scheduler.deleteLater()
+            self._highlight_scheduler = None
+
+        if highlighter is None:
             return
 
-        self._update_lines()
-        self._update_sidebar()
-        self.repaint()
+        self._highlight_scheduler = LazyHighlightScheduler(
+            self.document(),
+            highlighter,
+            parent=self,
+        )
+        self._highlight_scheduler.reset()
+        self._update_highlighting()
 
-    def _on_sidebar_selection_changed(self):
+    def rehighlight(self):
         """
-        Propagate the range of line selected in the sidebar to this text cursor.
+        Highlight the whole document again, for example if the highlighter rules
+        changed.
         """
-        self._updating_selection = True
-
-        selected_lines = self._sidebar.lines_selected_range
+        if self._highlight_scheduler:
+            self._highlight_scheduler.reset()
+            self._update_highlighting()
 
-        if not selected_lines:
-            self._updating_selection = False
-            self._on_selection_changed()
+    def set_follow_mode(self, enable: bool):
+        """
+        Keep the view at the bottom when lines are appended, like a ``tail -f``.
+        The undo stack is disabled while enabled.
+        """
+        if enable == self._follow_mode:
             return
+        self._follow_mode = enable
 
-        start = min(selected_lines)
-        end = max(selected_lines)
+        document = self.document()
+        if enable:
+            self._follow_undo_enabled = document.isUndoRedoEnabled()
+            document.setUndoRedoEnabled(False)
+        else:
+            document.setUndoRedoEnabled(self._follow_undo_enabled)
 
-        cursor = QtGui.QTextCursor(self.document().findBlockByNumber(start))
+    def set_left_margin(self, margin: int):
+        """
+        Set the margin size for the left side of the viewport.
 
-        if end > start:
-            ntimes = end - cursor.blockNumber()
-            cursor.movePosition(cursor.NextBlock, cursor.KeepAnchor, ntimes)
+        Necessary because the teh sidebar already override it.
+        """
+        self._left_margin = margin
+        self._update_margins()
 
-        cursor.movePosition(cursor.EndOfBlock, cursor.KeepAnchor)
+    def set_maximum_line_count(self, count: int):
+        """
+        Remove the oldest lines when appending above the given count, 0 for no limit.
+        """
+        self._maximum_line_count = count
+        if not self._block_count_updates_deferred:
+            self._trim_to_maximum_line_count()
 
-        self.setTextCursor(cursor)
+    def set_tab_character(self, character: str):
+        """
+        Change which characters are used to produce a tabulation when pressing the tab key.
 
-        scrollbar_h = self.horizontalScrollBar()
-        scrollbar_h.setSliderPosition(scrollbar_h.minimum())
+        Args:
+            character: anything but usually 4 spaces or the tab character ``\t``
+        """
+        self._tab_character = character
+        if self._block_metadata:
+            self._block_metadata.set_tab_size(self._get_tab_size())
 
-        self._updating_selection = False
+    def append_lines(self, lines: Iterable[str]):
+        """
+        Queue the given lines to be appended on the next frame, from any thread.
+        If the document ends with a line ending, the first line fills the last one.
+        """
+        # the signal is queued if emitted from another thread
+        if self._append_buffer.add(lines):
+            self._lines_queued.emit()
 
-    def _on_update_requested(self):
-        self._update_lines()
-        self._update_sidebar()
-        self.update()
+    def cancel_filter(self):
+        """
+        Stop the filter currently running if any. Lines already filtered stay hidden.
+        """
+        if not self._filter_worker:
+            return
+        self._filter_worker.cancel()
+        self._filter_worker = None
 
-    def _update_lines(self):
+    def cancel_find(self):
         """
-        Update the buffer of visible lines.
+        Stop the search currently running if any. Matches already found are kept.
         """
-        cursor_position = self.mapFromGlobal(self.cursor().pos())
-        selected_lines = range(self.selected_lines_start, self.selected_lines_end + 1)
-        last_visible = self._get_last_visible_block()
-        first_block = True
-        block = self.firstVisibleBlock()
+        if not self._find_worker:
+            return
+        self._find_worker.cancel()
+        self._find_worker = None
 
-        self._lines.clear_all_lines()
+    def cancel_replace(self):
+        """
+        Stop the replace-all currently running if any, nothing is replaced.
+        """
+        if not self._replace_worker:
+            return
+        self._replace_worker.cancel()
+        self._replace_worker = None
+        self._replace_matches = []
+        self.replace_finished.emit(0)
 
-        while block.isValid() and block != last_visible:
-            if not block.isVisible():
-                block = block.next()
-                continue
+    def cancel_line_operation(self):
+        """
+        Stop the line operation currently running if any. The document is left
+        unchanged.
+        """
+        if not self._line_operation_worker:
+            return
+        self._line_operation_worker.cancel()
+        self._line_operation_worker = None
+        self.line_operation_finished.emit(False)
 
-            block_geo = self.blockBoundingGeometry(block)
-            block_geo = block_geo.translated(self.contentOffset())
+    def cancel_load(self):
+        """
+        Stop the loading of text started with :meth:`load_file` or
+        :meth:`load_lines`. The text already loaded is kept.
+        """
+        if self._loader:
+            self._end_loading(success=False)
 
-            block_has_focus = block_geo.contains(cursor_position)
+    def clear_filter(self):
+        """
+        Stop the filter currently running if any and show all lines again.
+        """
+        self.cancel_filter()
+        self.show_lines()
 
-            if first_block:
-                block_position = QtWidgets.QStyleOptionViewItem.Beginning
-            elif block == last_visible:
-                block_position = QtWidgets.QStyleOptionViewItem.End
-            else:
-                block_position = QtWidgets.QStyleOptionViewItem.Invalid
-
-            text_line = TextLine(
-                number=block.blockNumber(),
-                geometry=block_geo,
-                hovered=block_has_focus,
-                selected=block.blockNumber() in selected_lines,
-                position=block_position,
-                pressed=block_has_focus and self._mouse_pressed,
-                alternate=bool(block.blockNumber() % 2),
-            )
-            self._lines.add_line(text_line)
+    def filter_lines(self, pattern: Union[str, re.Pattern], flags: int = 0):
+        """
+        Make visible only the lines matching the given regex pattern.
 
-            first_block = False
-            block = block.next()
+        The document is scanned in a separate thread, see the ``filter_`` signals.
+        """
+        self.cancel_filter()
 
-    def _update_margins(self):
-        current_margins = self.viewportMargins()
-        self.setViewportMargins(
-            self._sidebar.get_intended_width(self.blockCount()) + self._left_margin,
-            current_margins.top(),
-            current_margins.right(),
-            current_margins.bottom(),
+        if isinstance(pattern, str):
+            pattern = re.compile(pattern, flags)
+
+        worker = LineFilterWorker(self.document(), pattern, parent=self)
+        worker.chunk_processed.connect(
+            functools.partial(self._on_filter_chunk_processed, worker)
         )
+        worker.finished.connect(functools.partial(self._on_filter_finished, worker))
 
-    def _update_sidebar(self):
+        self._filter_worker = worker
+        self._filter_match_count = 0
+        self._filter_revision = self.document().revision()
+        worker.start()
+
+    def is_loading(self) -> bool:
         """
-        Updates lines displayed in the sidebar.
+        True if text is still being loaded by :meth:`load_file` or :meth:`load_lines`.
         """
-        # take in account padding from style
-        top_margin = self.rect().top() - self.contentsRect().top()
-        sidebar_lines = self._lines.copy()
-        sidebar_width = self._sidebar.width()
+        return self._loader is not None
+
+    def load_file(
+        self,
+        path: Union[str, Path],
+        encoding: str = "utf-8",
+        errors: str = "replace",
+    ):
+        """
+        Replace the document with the content of the given file, read in a separate
+        thread. See the ``load_`` signals.
+        """
+        self._start_loading(TextLoaderWorker(path, encoding, errors, parent=self))
 
-        for line in sidebar_lines:
-            line.geometry.setX(0)
-            line.geometry.translate(0, -top_margin)
-            line.geometry.setWidth(sidebar_width)
+    def load_lines(self, lines: Iterable[str]):
+        """
+        Replace the document with the given lines, consumed in a separate thread.
+        See the ``load_`` signals.
+        """
+        self._start_loading(TextLoaderWorker(lines, parent=self))
 
-        self._sidebar.set_line_buffer(sidebar_lines)
+    def clear_find(self):
+        """
+        Stop the search currently running if any and remove all the matches.
+        """
+        self.cancel_find()
+        self._find_refresh_timer.stop()
+        self._find_pattern = None
+        self._find_index.clear()
+        self._update_find_highlights()
 
-    def _update_sidebar_geo(self):
-        self._sidebar.setGeometry(
-            0,
-            0,
-            self._sidebar.get_intended_width(self.blockCount()),
-            self.height(),
+    def find_text(self, pattern: Union[str, re.Pattern], flags: int = 0):
+        """
+        Search all the matches of the given regex pattern in a separate thread.
+
+        Use :meth:`find_next` and :meth:`find_previous` to go through them.
+        """
+        self.cancel_find()
+        self._find_refresh_timer.stop()
+
+        if isinstance(pattern, str):
+            pattern = re.compile(pattern, flags)
+
+        worker = FindWorker(self.document(), pattern, parent=self)
+        worker.chunk_processed.connect(
+            functools.partial(
+                self._on_find_chunk_processed,
+                worker,
+                self.document().revision(),
+            )
         )
+        worker.finished.connect(functools.partial(self._on_find_finished, worker))
 
-    def _indent_selection(self):
+        self._find_worker = worker
+        self._find_pattern = pattern
+        self._find_index.clear()
+        self._update_find_highlights()
+        self.find_match_count_changed.emit(0)
+        worker.start()
+
+    def find_next(self) -> bool:
+        """
+        Select the first match after the text cursor, False if there is none.
+        """
         cursor = self.textCursor()
-        if not cursor.selectedText():
-            cursor.insertText(self._tab_character)
-            self.setTextCursor(cursor)
+        block = self.document().findBlock(cursor.selectionStart())
+        column = cursor.selectionStart() - block.position()
+        index = self._find_index.get_next_index(block.blockNumber(), column)
+        index = self._get_visible_match(index, forward=True)
+        if index is None:
+            return False
+        self._select_match(index)
+        return True
+
+    def find_previous(self) -> bool:
+        """
+        Select the last match before the text cursor, False if there is none.
+        """
+        cursor = self.textCursor()
+        block = self.document().findBlock(cursor.selectionStart())
+        column = cursor.selectionStart() - block.position()
+        index = self._find_index.get_previous_index(block.blockNumber(), column)
+        index = self._get_visible_match(index, forward=False)
+        if index is None:
+            return False
+        self._select_match(index)
+        return True
+
+    def replace_all(
+        self,
+        pattern: Union[str, re.Pattern],
+        replacement: str,
+        flags: int = 0,
+    ):
+        """
+        Replace all the matches of the given regex pattern, in a single edit.
+        """
+        self.cancel_replace()
+        if self.isReadOnly():
+            LOGGER.warning("Cannot replace text of a read-only document.")
+            self.replace_finished.emit(0)
             return
-        for line in range(self.selected_lines_start, self.selected_lines_end + 1):
-            block = self.document().findBlockByLineNumber(line)
-            cursor = QtGui.QTextCursor(block)
-            cursor.insertText(self._tab_character)
 
-    def _unindent_selection(self):
-        cursor = self.textCursor()
-        cursor.setPosition(
-            cursor.position() - len(self._tab_character), cursor.KeepAnchor
+        if isinstance(pattern, str):
+            pattern = re.compile(pattern, flags)
+
+        worker = FindWorker(self.document(), pattern, replacement, parent=self)
+        worker.chunk_processed.connect(
+            functools.partial(self._on_replace_chunk_processed, worker)
         )
-        for line in range(self.selected_lines_start, self.selected_lines_end + 1):
-            block = self.document().findBlockByLineNumber(line)
-            cursor = QtGui.QTextCursor(block)
-            cursor.setPosition(
-                cursor.position() + len(self._tab_character), cursor.KeepAnchor
+        worker.finished.connect(
+            functools.partial(
+                self._on_replace_finished,
+                worker,
+                self.document().revision(),
             )
-            if cursor.selectedText() == self._tab_character:
-                cursor.removeSelectedText()
-
-    def jump_to_line(self, line_number: int):
+        )
+        self._replace_worker = worker
+        self._replace_matches = []
+        worker.start()
+
+    def process_lines(
+        self,
+        function: Callable[[list[str]], list[str]],
+        target: str = "selection",
+    ):
         """
-        Set the cursor (and the viewport) active on the given line number.
+        Replace the lines with the result of ``function(lines)``, called in a
+        separate thread. Hidden lines are never processed.
+
+        Args:
+            target: "selection", "sidebar" or "visible" lines.
         """
-        block = self.document().findBlockByNumber(line_number)
-        if not block.isVisible():
-            LOGGER.warning(f"Cannot jump to line {line_number}: line is hided.")
+        if target == "selection":
+            ranges = [(self.selected_lines_start, self.selected_lines_end)]
+        elif target == "sidebar":
+            ranges = list(self._sidebar.selection)
+        elif target == "visible":
+            ranges = [(0, self.blockCount() - 1)]
+        else:
+            raise ValueError(f"Unsupported target {target!r}")
+
+        self.cancel_line_operation()
+        if self.isReadOnly():
+            LOGGER.warning("Cannot process lines of a read-only document.")
+            self.line_operation_finished.emit(False)
             return
-        cursor = QtGui.QTextCursor(block)
-        self.setTextCursor(cursor)
 
-    def set_alternating_row_colors(self, enable: bool):
+        visible_ranges = []
+        for start, end in ranges:
+            visible_ranges += self._hidden_ranges.gaps_between(start, end)
+        if not visible_ranges:
+            self.line_operation_finished.emit(False)
+            return
+
+        worker = LineOperationWorker(
+            self.document(),
+            visible_ranges,
+            function,
+            parent=self,
+        )
+        worker.processed.connect(
+            functools.partial(
+                self._on_line_operation_processed,
+                worker,
+                self.document().revision(),
+                visible_ranges,
+            )
+        )
+        worker.finished.connect(
+            functools.partial(self._on_line_operation_finished, worker)
+        )
+        self._line_operation_worker = worker
+        worker.start()
+
+    def dedupe_lines(self, target: str = "selection"):
         """
-        True to allow alternating rows to have a different color if it was defined
-        in the style.
+        Remove the duplicated lines, keeping the first occurrence.
+        See :meth:`process_lines` for the targets.
         """
-        self._alternating_row_colors = enable
-        self._sidebar.set_alternating_row_colors(enable)
-
-    def set_left_margin(self, margin: int):
+        self.process_lines(dedupe_lines, target)
+
+    def keep_lines_matching(
+        self,
+        pattern: Union[str, re.Pattern],
+        flags: int = 0,
+        invert: bool = False,
+        target: str = "selection",
+    ):
         """
-        Set the margin size for the left side of the viewport.
+        Remove the lines not matching the given regex pattern, or the matching ones
+        if ``invert``.
+        """
+        if isinstance(pattern, str):
+            pattern = re.compile(pattern, flags)
+        self.process_lines(
+            functools.partial(keep_lines_matching, pattern=pattern, invert=invert),
+            target,
+        )
 
-        Necessary because the teh sidebar already override it.
+    def reverse_lines(self, target: str = "selection"):
         """
-        self._left_margin = margin
-        self._update_margins()
+        Reverse the order of the lines. See :meth:`process_lines` for the targets.
+        """
+        self.process_lines(reverse_lines, target)
 
-    def set_tab_character(self, character: str):
+    def sort_lines(self, target: str = "selection", reverse: bool = False):
         """
-        Change which characters are used to produce a tabulation when pressing the tab key.
+        Sort the lines alphabetically. See :meth:`process_lines` for the targets.
+        """
+        self.process_lines(functools.partial(sort_lines, reverse=reverse), target)
 
-        Args:
-            character: anything but usually 4 spaces or the tab character ``\t``
+    def trim_lines(self, target: str = "selection"):
         """
-        self._tab_character = character
+        Remove trailing whitespaces. See :meth:`process_lines` for the targets.
+        """
+        self.process_lines(trim_lines, target)
 
-    def isolate_lines(self, lines: list[int]):
+    def isolate_lines(self, lines: Iterable[int]):
         """
         Make visible only the given lines number.
 
         Args:
             lines: list of line numbers. starts at 0.
         """
-        all_lines = set(range(self.blockCount()))
-        lines_to_hide = list(all_lines.difference(set(lines)))
-        lines_to_hide.sort()
-        self.show_lines(lines)
-        self.hide_lines(lines_to_hide)
+        self.isolate_line_ranges(self._lines_to_ranges(lines))
+
+    def isolate_line_ranges(self, ranges: Iterable[range]):
+        """
+        Make visible only the lines in the given ranges.
+
+        Args:
+            ranges: ranges of line numbers with a step of 1. starts at 0.
+        """
+        self._isolate_ranges(self._clamp_ranges(ranges), 0, self.blockCount() - 1)
 
-    def hide_lines(self, lines: Optional[list[int]] = None):
+    def hide_lines(self, lines: Optional[Iterable[int]] = None):
         """
         Hide the given lines number.
 
         Args:
-            lines: list of line numbers. starts at 0.
+            lines: list of line numbers. starts at 0. None to hide all lines.
         """
-        lines = lines or range(self.blockCount())
+        lines = range(self.blockCount()) if lines is None else lines
+        self.hide_line_ranges(self._lines_to_ranges(lines))
 
-        for line in lines:
-            block = self.document().findBlockByNumber(line)
-            block.setVisible(False)
+    def hide_line_ranges(self, ranges: Iterable[range]):
+        """
+        Hide the lines in the given ranges.
 
-        # HACK to trigger a FULL ui refresh, update() doesn't work.
-        self.resize(self.width() - 1, self.height())
-        self.resize(self.width() + 1, self.height())
+        Args:
+            ranges: ranges of line numbers with a step of 1. starts at 0.
+        """
+        changes = []
+        for start, end in self._clamp_ranges(ranges):
+            for hidden_range in self._hidden_ranges.gaps_between(start, end):
+                changes.append((*hidden_range, False))
+        self._set_ranges_visibility(changes)
 
-    def show_lines(self, lines: Optional[list[int]] = None):
+    def show_lines(self, lines: Optional[Iterable[int]] = None):
         """
         Make the given lines visible again.
 
         Pass None to show all lines.
         """
-        lines = lines or list(range(self.blockCount()))
-        for line in lines:
-            block = self.document().findBlockByNumber(line)
-            block.setVisible(True)
+        lines = range(self.blockCount()) if lines is None else lines
+        self.show_line_ranges(self._lines_to_ranges(lines))
+
+    def show_line_ranges(self, ranges: Iterable[range]):
+        """
+        Make the lines in the given ranges visible again.
 
-        # HACK to trigger a FULL ui refresh, update() doesn't work.
-        self.resize(self.width() - 1, self.height())
-        self.resize(self.width() + 1, self.height())
+        Args:
+            ranges: ranges of line numbers with a step of 1. starts at 0.
+        """
+        changes = []
+        for start, end in self._clamp_ranges(ranges):
+            for shown_range in self._hidden_ranges.ranges_between(start, end):
+                changes.append((*shown_range, True))
+        self._set_ranges_visibility(changes)
 
     # Overrides
 
+    def changeEvent(self, event: QtCore.QEvent):
+        if event.type() in (QtCore.QEvent.FontChange, QtCore.QEvent.StyleChange):
+            self._invalidate_lines()
+        super().changeEvent(event)
+
     def event(self, event: QtCore.QEvent) -> bool:
-        # HACK: we draw each line as an individual item in paintEvent but events are
-        # still triggered on the global parent widget. So repaint more often.
-        if event.type() in (QtCore.QEvent.HoverMove, QtCore.QEvent.HoverLeave):
+        # we draw each line as an individual item in paintEvent but events are
+        # still triggered on the global parent widget. So repaint hovered lines.
+        if event.type() == QtCore.QEvent.HoverMove:
             self._on_hover_event()
-            self._update_sidebar()
-            self.update()
+        elif event.type() == QtCore.QEvent.HoverLeave:
+            self._on_hover_event(leaving=True)
         return super().event(event)
 
     def keyPressEvent(self, event: QtGui.QKeyEvent):
@@ -362,36 +2247,68 @@ class LinePlainTextEdit(QtWidgets.QPlainTextEdit):
         self._mouse_pressed = True
         self._update_lines()
         self._update_sidebar()
-        self.repaint()
+        self._request_repaint()
 
     def mouseReleaseEvent(self, event: QtGui.QMouseEvent):
         super().mouseReleaseEvent(event)
         self._mouse_pressed = False
         self._update_lines()
         self._update_sidebar()
-        self.repaint()
+        self._request_repaint()
 
     def resizeEvent(self, event: QtGui.QResizeEvent) -> None:
         super().resizeEvent(event)
+        self._invalidate_lines()
         self._update_sidebar_geo()
+        if self._huge_file:
+            self._update_huge_scrollbar_geo()
+            self._update_huge_scrollbar_range()
         self._update_lines()
         self._update_sidebar()
 
+    def setPlainText(self, text: str):
+        if not self._materializing:
+            self.close_huge_file()
+        # new blocks are all visible
+        self._hidden_ranges.clear()
+        self._line_number_offset = 0
+        self._sidebar.set_line_number_offset(0)
+        super().setPlainText(text)
+
+    def setLineWrapMode(self, mode: QtWidgets.QPlainTextEdit.LineWrapMode):
+        super().setLineWrapMode(mode)
+        self._invalidate_lines()
+
     def paintEvent(self, event: QtGui.QPaintEvent):
         qpainter = QtGui.QPainter(self.viewport())
+        event_rect = event.rect()
+        start_time = self._instrumentation.start()
+        lines = self._lines.get_lines_between(event_rect.top(), event_rect.bottom())
+        if self._reduced_styling:
+            lines = []
+
+        # a single option patched for each line
+        qstyleoption = QtWidgets.QStyleOptionViewItem()
+        qstyleoption.initFrom(self)
+        base_state = qstyleoption.state
+        base_features = qstyleoption.features
+        style = self.style()
 
-        for line in self._lines:
-            qstyleoption = QtWidgets.QStyleOptionViewItem()
-            qstyleoption.initFrom(self)
+        for line in lines:
+            qstyleoption.state = base_state
+            qstyleoption.features = base_features
             line.apply_on_qstyle_option(
                 qstyleoption, apply_alternate=self._alternating_row_colors
             )
 
-            self.style().drawPrimitive(
+            style.drawPrimitive(
                 QtWidgets.QStyle.PE_PanelItemViewItem,
                 qstyleoption,
                 qpainter,
                 self,
             )
 
+        self._instrumentation.stop("paint_lines", start_time, len(lines))
+        start_time = self._instrumentation.start()
         super().paintEvent(event)
+        self._instrumentation.stop("paint_text", start_time)
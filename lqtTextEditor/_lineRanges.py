@@ -0,0 +1,199 @@
+import bisect
+import logging
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+def group_lines_as_ranges(lines: Iterable[int]) -> list[tuple[int, int]]:
+    """
+    Convert the given line numbers to a sorted list of ``(start, end)`` ranges of
+    consecutive lines, ``end`` included.
+
+    A ``range`` with a step of 1 is converted without iterating it.
+    """
+    if isinstance(lines, range) and lines.step == 1:
+        return [(lines.start, lines.stop - 1)] if len(lines) else []
+
+    ranges = []
+    for line in sorted(set(lines)):
+        if ranges and ranges[-1][1] + 1 == line:
+            ranges[-1][1] = line
+        else:
+            ranges.append([line, line])
+    return [(start, end) for start, end in ranges]
+
+
+class LineRangeSet:
+    """
+    Set of line numbers stored as sorted and disjoint ranges, like hidden lines.
+
+    Ranges are stored with their ``start`` and ``end`` both included. Adjacent and
+    overlapping ranges are always merged, so finding the first line outside of the
+    set after a line in it is a single bisect.
+
+    Line numbers starts at 0.
+    """
+
+    def __init__(self):
+        self._starts: list[int] = []
+        self._ends: list[int] = []
+
+    def __bool__(self):
+        return bool(self._starts)
+
+    def __contains__(self, line: int) -> bool:
+        return self.get_range(line) is not None
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        return zip(self._starts, self._ends)
+
+    def __len__(self):
+        return len(self._starts)
+
+    @property
+    def count(self) -> int:
+        """
+        Total number of lines in the set.
+        """
+        return sum(self._ends) - sum(self._starts) + len(self._starts)
+
+    def add(self, start: int, end: int):
+        """
+        Add the given range of lines to the set.
+
+        Args:
+            start: first line of the range
+            end: last line of the range, included.
+        """
+        if end < start:
+            return
+        # ranges that overlap or are adjacent to the new one are in [i:j]
+        i = bisect.bisect_left(self._ends, start - 1)
+        j = bisect.bisect_right(self._starts, end + 1)
+        if i < j:
+            start = min(start, self._starts[i])
+            end = max(end, self._ends[j - 1])
+        self._starts[i:j] = [start]
+        self._ends[i:j] = [end]
+
+    def clear(self):
+        """
+        Remove all the lines of the set.
+        """
+        self._starts = []
+        self._ends = []
+
+    def ranges_between(self, start: int, end: int) -> list[tuple[int, int]]:
+        """
+        Get the portions of the ranges that are in the given range, both included.
+        """
+        if end < start:
+            return []
+        i = bisect.bisect_left(self._ends, start)
+        j = bisect.bisect_right(self._starts, end)
+        return [
+            (max(self._starts[k], start), min(self._ends[k], end)) for k in range(i, j)
+        ]
+
+    def gaps_between(self, start: int, end: int) -> list[tuple[int, int]]:
+        """
+        Get the ranges of lines not in the set that are in the given range, both
+        included.
+        """
+        gaps = []
+        for range_start, range_end in self.ranges_between(start, end):
+            if range_start > start:
+                gaps.append((start, range_start - 1))
+            start = range_end + 1
+        if start <= end:
+            gaps.append((start, end))
+        return gaps
+
+    def get_range(self, line: int) -> Optional[tuple[int, int]]:
+        """
+        Get the range the given line is part of, None if the line is not in the set.
+        """
+        index = bisect.bisect_right(self._starts, line) - 1
+        if index >= 0 and self._ends[index] >= line:
+            return self._starts[index], self._ends[index]
+        return None
+
+    def next_outside(self, line: int) -> int:
+        """
+        Get the first line not in the set starting from the given one, included.
+
+        The returned line might be past the end of the document.
+        """
+        line_range = self.get_range(line)
+        return line_range[1] + 1 if line_range else line
+
+    def previous_outside(self, line: int) -> int:
+        """
+        Get the first line not in the set before the given one, included.
+
+        Return -1 if there is no such line.
+        """
+        line_range = self.get_range(line)
+        return line_range[0] - 1 if line_range else line
+
+    def remove(self, start: int, end: int):
+        """
+        Remove the given range of lines from the set.
+
+        Args:
+            start: first line of the range
+            end: last line of the range, included.
+        """
+        if end < start:
+            return
+        # ranges that overlap the removed one are in [i:j]
+        i = bisect.bisect_left(self._ends, start)
+        j = bisect.bisect_right(self._starts, end)
+        if i >= j:
+            return
+
+        new_starts = []
+        new_ends = []
+        if self._starts[i] < start:
+            new_starts.append(self._starts[i])
+            new_ends.append(start - 1)
+        if self._ends[j - 1] > end:
+            new_starts.append(end + 1)
+            new_ends.append(self._ends[j - 1])
+
+        self._starts[i:j] = new_starts
+        self._ends[i:j] = new_ends
+
+    def shift(self, line: int, delta: int):
+        """
+        Offset the line numbers after the given line, to reflect lines being
+        inserted (positive delta) or removed (negative delta) right after it.
+
+        Args:
+            line: last line number that is not affected.
+            delta: number of lines inserted or removed after ``line``.
+        """
+        if not delta:
+            return
+        if delta < 0:
+            self.remove(line + 1, line - delta)
+
+        index = bisect.bisect_right(self._starts, line)
+        # a range containing ``line`` grows or shrinks
+        if index > 0 and self._ends[index - 1] > line:
+            self._ends[index - 1] += delta
+
+        for i in range(index, len(self._starts)):
+            self._starts[i] += delta
+            self._ends[i] += delta
+
+        # removing lines can make two ranges adjacent
+        if 0 < index < len(self._starts):
+            if self._ends[index - 1] + 1 >= self._starts[index]:
+                self._ends[index - 1] = self._ends[index]
+                del self._starts[index]
+                del self._ends[index]
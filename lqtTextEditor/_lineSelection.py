@@ -0,0 +1,133 @@
+import logging
+from typing import Iterator
+from typing import Optional
+
+from lqtTextEditor._lineRanges import LineRangeSet
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class LineRangeSelection:
+    """
+    Selection of lines stored as ranges, so its cost doesn't depend on the number
+    of lines selected.
+
+    The selection is made of committed ranges, plus an active range going from an
+    anchor line to a current line, which is the one modified by dragging.
+
+    Line numbers starts at 0 and ranges have both ``start`` and ``end`` included.
+    """
+
+    def __init__(self):
+        self._committed: LineRangeSet = LineRangeSet()
+        self._anchor: Optional[int] = None
+        self._current: Optional[int] = None
+
+    def __bool__(self):
+        return self._anchor is not None or bool(self._committed)
+
+    def __contains__(self, line: int) -> bool:
+        active = self.active_range
+        if active and active[0] <= line <= active[1]:
+            return True
+        return line in self._committed
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        return iter(self.get_ranges_between(0, self.last_line))
+
+    @property
+    def anchor(self) -> Optional[int]:
+        """
+        Line from which the active range was started.
+        """
+        return self._anchor
+
+    @property
+    def current(self) -> Optional[int]:
+        """
+        Line to which the active range was extended.
+        """
+        return self._current
+
+    @property
+    def active_range(self) -> Optional[tuple[int, int]]:
+        """
+        Range being modified, sorted, None if no line is selected.
+        """
+        if self._anchor is None:
+            return None
+        return min(self._anchor, self._current), max(self._anchor, self._current)
+
+    @property
+    def last_line(self) -> int:
+        """
+        Highest line number selected, -1 if the selection is empty.
+        """
+        last_line = -1
+        for start, end in self._committed:
+            last_line = end
+        active = self.active_range
+        if active:
+            last_line = max(last_line, active[1])
+        return last_line
+
+    def clear(self):
+        self._committed.clear()
+        self._anchor = None
+        self._current = None
+
+    def extend(self, line: int):
+        """
+        Move the end of the active range to the given line, or start a new range
+        if there is none.
+        """
+        if self._anchor is None:
+            self._anchor = line
+        self._current = line
+
+    def get_ranges_between(
+        self,
+        start: int,
+        end: int,
+        include_active: bool = True,
+    ) -> list[tuple[int, int]]:
+        """
+        Get the merged ranges of selected lines, clipped to the given lines.
+
+        Args:
+            start: first line number
+            end: last line number, included.
+            include_active: False to only get the ranges that are not being modified.
+        """
+        ranges = self._committed.ranges_between(start, end)
+        active = self.active_range if include_active else None
+        if not active or active[1] < start or active[0] > end:
+            return ranges
+
+        active = (max(active[0], start), min(active[1], end))
+        merged = []
+        for selected_range in sorted(ranges + [active]):
+            if merged and selected_range[0] <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], selected_range[1]))
+            else:
+                merged.append(selected_range)
+        return merged
+
+    def start(self, line: int, add: bool = False):
+        """
+        Start a new active range on the given line.
+
+        Args:
+            line: line number to select
+            add: True to keep the lines already selected, else the selection is
+                replaced.
+        """
+        if add:
+            active = self.active_range
+            if active:
+                self._committed.add(*active)
+        else:
+            self._committed.clear()
+        self._anchor = line
+        self._current = line
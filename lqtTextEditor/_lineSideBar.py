@@ -1,12 +1,17 @@
 import logging
 from typing import Optional
+from typing import Union
 
 from Qt import QtGui
 from Qt import QtCore
 from Qt import QtWidgets
 
+from lqtTextEditor._instrumentation import Instrumentation
 from lqtTextEditor._line import TextLine
 from lqtTextEditor._line import TextLineBuffer
+from lqtTextEditor._line import TextLineBufferView
+from lqtTextEditor._lineSelection import LineRangeSelection
+from lqtTextEditor._repaintScheduler import RepaintScheduler
 
 
 LOGGER = logging.getLogger(__name__)
@@ -20,108 +25,406 @@ class LineSideBarWidget(QtWidgets.QWidget):
     Made to work with :class:`LineNumberedTextEditor`
 
     Line are internally stored as starting from 0 but are displaying as starting from 1.
+
+    Line cells are rendered once per style state in pixmaps, and numbers are kept as
+    static texts, so painting doesn't resolve the stylesheet for every line.
     """
 
+    # maximum number of items in each render cache before it is emptied
+    _RENDER_CACHE_SIZE = 2048
+
+    # number of pixels outside the widget per extra line auto-scrolled each tick
+    _AUTO_SCROLL_STEP = 20
+
     line_selection_changed = QtCore.Signal()
 
+    auto_scroll_requested = QtCore.Signal(int)
+    """
+    The mouse is dragged outside the widget: number of lines to scroll, negative to
+    scroll up. The lines displayed must be updated before the signal returns.
+    """
+
+    intended_width_changed = QtCore.Signal()
+    """
+    The font or style changed so :meth:`get_intended_width` may return a different
+    width.
+    """
+
     def __init__(self, parent=None):
         super().__init__(parent)
 
-        self._lines: TextLineBuffer = TextLineBuffer()
+        self._lines: TextLineBufferView = TextLineBufferView()
         self._alternating_row_colors: bool = False
+        self._item_backgrounds_enabled: bool = True
+        self._repaint_scheduler: Optional[RepaintScheduler] = None
+        self._instrumentation: Instrumentation = Instrumentation(self)
 
         self._mouse_pressed: bool = False
 
         self.margins_side = 8
-
-        self._line_selected_start: Optional[int] = None
-        self._line_selected_end: Optional[int] = None
+        # width of a digit in the current font, None when it must be measured again
+        self._digit_width: Optional[int] = None
+
+        # (line state..., width, height): cell background rendered for that state
+        self._cell_pixmaps: dict[tuple, QtGui.QPixmap] = {}
+        self._number_texts: dict[str, QtGui.QStaticText] = {}
+        # brush drawn under selected lines, derived from the palette
+        self._highlight_brush: Optional[QtGui.QBrush] = None
+        # device pixel ratio the render caches were built for
+        self._render_cache_ratio: float = 0.0
+        # added to each line number displayed
+        self._line_number_offset: int = 0
+
+        self._selection: LineRangeSelection = LineRangeSelection()
+        # number of the lines with a marker drawn on their side
+        self._marked_lines: set[int] = set()
+        # emit the selection change at most once per frame while dragging
+        self._selection_timer = QtCore.QTimer(self)
+        self._selection_timer.setSingleShot(True)
+        self._selection_timer.setInterval(16)
+        self._selection_timer.timeout.connect(self._emit_selection_changed)
+        self._auto_scroll_timer = QtCore.QTimer(self)
+        self._auto_scroll_timer.setInterval(16)
+        self._auto_scroll_timer.timeout.connect(self._on_auto_scroll_timeout)
 
         self.setAttribute(QtCore.Qt.WA_Hover, True)
+        # an opaque widget can have its pixels moved on scroll instead of repainted
+        self.setAutoFillBackground(True)
 
     @property
-    def lines_selected_range(self) -> list[int]:
+    def lines_selected_range(self) -> range:
         """
-        Sequence of line numbers that are selected.
+        Sequence of line numbers of the range being selected.
 
         Can be ascending or descending order. Example : [5,4,3,2].
         """
-        if self._line_selected_start is None and self._line_selected_end is None:
-            return []
-        elif self._line_selected_start is None and self._line_selected_end is not None:
-            return [self._line_selected_end]
-        elif self._line_selected_end is None and self._line_selected_start is not None:
-            return [self._line_selected_start]
-
-        direction = 1 if self._line_selected_end > self._line_selected_start else -1
-        return list(
-            range(
-                self._line_selected_start,
-                self._line_selected_end + direction,
-                direction,
-            )
+        anchor = self._selection.anchor
+        if anchor is None:
+            return range(0)
+        current = self._selection.current
+        direction = 1 if current >= anchor else -1
+        return range(anchor, current + direction, direction)
+
+    @property
+    def selection(self) -> LineRangeSelection:
+        """
+        All the ranges of lines selected.
+
+        Click to select a line, Ctrl+click to add a new range and Shift+click to
+        extend the last range.
+        """
+        return self._selection
+
+    def _emit_selection_changed(self):
+        self._selection_timer.stop()
+        self.line_selection_changed.emit()
+
+    def _on_auto_scroll_timeout(self):
+        """
+        Scroll of a speed proportional to the distance of the mouse outside the
+        widget, then extend the selection to the line at the edge.
+        """
+        y = self.mapFromGlobal(QtGui.QCursor.pos()).y()
+        if y < 0:
+            distance = y
+        elif y >= self.height():
+            distance = y - self.height() + 1
+        else:
+            self._auto_scroll_timer.stop()
+            return
+
+        lines = int(distance / self._AUTO_SCROLL_STEP)
+        lines += 1 if distance > 0 else -1
+        self.auto_scroll_requested.emit(lines)
+
+        visible_lines = self._lines.get_lines_between(0, self.height())
+        if not visible_lines:
+            return
+        line = visible_lines[0] if distance < 0 else visible_lines[-1]
+        if line.number == self._selection.current:
+            return
+        self._selection.extend(line.number)
+        self._emit_selection_changed()
+
+    def _clear_render_cache(self):
+        self._cell_pixmaps = {}
+        self._number_texts = {}
+        self._highlight_brush = None
+
+    def _get_highlight_brush(self) -> QtGui.QBrush:
+        if self._highlight_brush is None:
+            # text color with a low opacity, so selection is visible without
+            # stylesheet
+            brush = self.palette().text()
+            brush.setColor(QtGui.QColor(*brush.color().toTuple()[:-1], 30))
+            self._highlight_brush = brush
+        return self._highlight_brush
+
+    def _get_cell_pixmap(self, line: TextLine, size: QtCore.QSize) -> QtGui.QPixmap:
+        """
+        Get the background of a line cell of the given size, rendered with the style.
+        """
+        alternate = line.alternate and self._alternating_row_colors
+        key = (
+            line.hovered,
+            line.pressed,
+            line.selected,
+            alternate,
+            line.position,
+            size.width(),
+            size.height(),
         )
+        pixmap = self._cell_pixmaps.get(key)
+        if pixmap is not None:
+            return pixmap
+
+        if len(self._cell_pixmaps) >= self._RENDER_CACHE_SIZE:
+            self._cell_pixmaps = {}
+
+        ratio = self._render_cache_ratio
+        pixmap = QtGui.QPixmap(size * ratio)
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(QtCore.Qt.transparent)
+        qpainter = QtGui.QPainter(pixmap)
+        cell_geometry = QtCore.QRectF(0, 0, size.width(), size.height())
+
+        qstyleoption = QtWidgets.QStyleOptionViewItem()
+        qstyleoption.initFrom(self)
+        line.apply_on_qstyle_option(
+            qstyleoption,
+            apply_alternate=self._alternating_row_colors,
+            geometry=cell_geometry,
+        )
+
+        if line.selected:
+            # we draw first using the palette so if no stylesheet, we still
+            # have an effect visible
+            qpainter.fillRect(cell_geometry, self._get_highlight_brush())
+
+        # draw line's cell
+        self.style().drawPrimitive(
+            QtWidgets.QStyle.PE_PanelItemViewItem,
+            qstyleoption,
+            qpainter,
+            self,
+        )
+        qpainter.end()
+
+        self._cell_pixmaps[key] = pixmap
+        return pixmap
+
+    def _get_number_text(self, number: int) -> QtGui.QStaticText:
+        """
+        Get the text to draw for the given line number, with its layout cached.
+        """
+        text = str(number + 1 + self._line_number_offset)
+        static_text = self._number_texts.get(text)
+        if static_text is not None:
+            return static_text
+
+        if len(self._number_texts) >= self._RENDER_CACHE_SIZE:
+            self._number_texts = {}
+
+        static_text = QtGui.QStaticText(text)
+        static_text.setTextFormat(QtCore.Qt.PlainText)
+        static_text.prepare(QtGui.QTransform(), self.font())
+        self._number_texts[text] = static_text
+        return static_text
+
+    def clear_selection(self):
+        if not self._selection:
+            return
+        self._selection.clear()
+        self.line_selection_changed.emit()
+        self.request_repaint()
+
+    def get_digit_width(self) -> int:
+        """
+        Width of a single digit in the current font, cached until the font or the
+        style change.
+        """
+        if self._digit_width is None:
+            width = self.fontMetrics().boundingRect("9")
+            # hack to take in account font bearing
+            self._digit_width = self.fontMetrics().boundingRect(width, 0, "9").width()
+        return self._digit_width
 
     def get_intended_width(self, max_line) -> int:
-        width = self.fontMetrics().boundingRect("9")
-        # hack to take in account font bearing
-        width = self.fontMetrics().boundingRect(width, 0, "9").width()
         max_lines = max(max_line, 9999)
-        width = width * len(str(max_lines))
+        width = self.get_digit_width() * len(str(max_lines))
         return width + (self.margins_side * 2)
 
+    def request_repaint(self, rect: Optional[QtCore.QRect] = None):
+        """
+        Schedule a repaint of the given area, or the whole widget if None.
+
+        Go through the repaint scheduler if one was set.
+        """
+        if self._repaint_scheduler:
+            self._repaint_scheduler.request(self, rect)
+        elif rect is None:
+            self.update()
+        else:
+            self.update(rect)
+
     def set_alternating_row_colors(self, enable: bool):
         """
         True to allow alternating rows to have a different color if it was defined
         in the style.
         """
         self._alternating_row_colors = enable
+        self._clear_render_cache()
+
+    def scroll_lines(self, dy: int):
+        """
+        Move the lines already painted of the given number of pixels, so only the
+        lines exposed are painted.
+
+        Must be called once the lines displayed were updated for the new scroll
+        position.
+        """
+        if self._repaint_scheduler:
+            self._repaint_scheduler.scroll(self, 0, dy)
+        else:
+            self.scroll(0, dy)
+
+    def set_line_buffer(
+        self,
+        buffer: Union[TextLineBuffer, TextLineBufferView],
+        repaint: bool = True,
+    ):
+        """
+        Set the lines to display.
 
-    def set_line_buffer(self, buffer: TextLineBuffer):
+        A :class:`TextLineBuffer` is displayed as is, while a
+        :class:`TextLineBufferView` allows to share the lines of another widget.
+
+        Args:
+            buffer: lines to display
+            repaint: False to not repaint the widget, when the caller takes care of
+                repainting only what changed.
+        """
+        if isinstance(buffer, TextLineBuffer):
+            buffer = TextLineBufferView(buffer, x=0, width=self.width())
         self._lines = buffer
-        self.repaint()
+        if repaint:
+            self.request_repaint()
+
+    def set_item_backgrounds_enabled(self, enable: bool):
+        """
+        False to only draw the line numbers, without the per-line item styling.
+        """
+        if enable == self._item_backgrounds_enabled:
+            return
+        self._item_backgrounds_enabled = enable
+        self.request_repaint()
+
+    def set_instrumentation(self, instrumentation: Instrumentation):
+        """
+        Share the instrumentation recording the paint duration with other widgets.
+        """
+        self._instrumentation = instrumentation
+
+    def set_marked_lines(self, lines: set[int]):
+        """
+        Draw a marker on the side of the given lines, like lines with search
+        matches. Only the lines displayed need to be given.
+        """
+        if lines == self._marked_lines:
+            return
+        self._marked_lines = lines
+        self.request_repaint()
+
+    def set_line_number_offset(self, offset: int):
+        """
+        Offset added to the number displayed for each line, when the lines displayed
+        are not the first lines of the document.
+        """
+        if offset == self._line_number_offset:
+            return
+        self._line_number_offset = offset
+        self._number_texts = {}
+        self.request_repaint()
+
+    def set_repaint_scheduler(self, scheduler: Optional[RepaintScheduler]):
+        """
+        Share a scheduler to merge the repaint requests with other widgets.
+        """
+        self._repaint_scheduler = scheduler
+
+    def update_line(self, text_line: TextLine):
+        """
+        Schedule a repaint of only the area covered by the given line.
+        """
+        self.request_repaint(self._lines.map_geometry(text_line).toAlignedRect())
 
     # Overrides
 
-    def event(self, event: QtCore.QEvent) -> bool:
-        # HACK: we draw each line as an individual item in paintEvent but events are
-        # still triggered on the global parent widget. So repaint more often.
-        if event.type() in (QtCore.QEvent.HoverMove, QtCore.QEvent.HoverLeave):
-            self.repaint()
-        return super().event(event)
+    def changeEvent(self, event: QtCore.QEvent):
+        super().changeEvent(event)
+        if event.type() in (QtCore.QEvent.FontChange, QtCore.QEvent.StyleChange):
+            self._digit_width = None
+            self.intended_width_changed.emit()
+        if event.type() in (
+            QtCore.QEvent.FontChange,
+            QtCore.QEvent.StyleChange,
+            QtCore.QEvent.PaletteChange,
+            # state used by the style
+            QtCore.QEvent.ActivationChange,
+            QtCore.QEvent.EnabledChange,
+        ):
+            self._clear_render_cache()
 
     def mousePressEvent(self, event: QtGui.QMouseEvent):
         super().mousePressEvent(event)
         self._mouse_pressed = True
         pos = self.mapFromGlobal(self.cursor().pos())
-        self._line_selected_end = None
-
-        self._line_selected_start = self._lines.get_line_from_position(pos)
-        if self._line_selected_start:
-            self._line_selected_start = self._line_selected_start.number
+        line = self._lines.get_line_from_position(pos)
+        modifiers = event.modifiers()
+
+        if not line:
+            if not modifiers:
+                self._selection.clear()
+        elif modifiers & QtCore.Qt.ShiftModifier and self._selection:
+            self._selection.extend(line.number)
+        else:
+            add = bool(modifiers & QtCore.Qt.ControlModifier)
+            self._selection.start(line.number, add=add)
 
         self.line_selection_changed.emit()
-        self.update()
+        self.request_repaint()
 
     def mouseMoveEvent(self, event: QtGui.QMouseEvent) -> None:
         super().mouseMoveEvent(event)
+        if not self._mouse_pressed:
+            return
+
         pos = self.mapFromGlobal(self.cursor().pos())
+        if pos.y() < 0 or pos.y() >= self.height():
+            if not self._auto_scroll_timer.isActive():
+                self._auto_scroll_timer.start()
+            return
+        self._auto_scroll_timer.stop()
 
-        self._line_selected_end = self._lines.get_line_from_position(pos)
-        if self._line_selected_end:
-            self._line_selected_end = self._line_selected_end.number
+        line = self._lines.get_line_from_position(pos)
+        if not line or line.number == self._selection.current:
+            return
 
-        self.line_selection_changed.emit()
-        self.update()
+        # the editor repaints what is needed once the selection is propagated
+        self._selection.extend(line.number)
+        if not self._selection_timer.isActive():
+            self._selection_timer.start()
 
     def mouseReleaseEvent(self, event: QtGui.QMouseEvent):
         super().mouseReleaseEvent(event)
         self._mouse_pressed = False
-        self.line_selection_changed.emit()
-        self.update()
+        self._auto_scroll_timer.stop()
+        self._emit_selection_changed()
+        self.request_repaint()
 
     def paintEvent(self, event: QtGui.QPaintEvent):
         super().paintEvent(event)
+        start_time = self._instrumentation.start()
         qpainter = QtGui.QPainter(self)
 
         # draw the whole sidebar background as regular QWidget
@@ -134,46 +437,49 @@ class LineSideBarWidget(QtWidgets.QWidget):
             self,
         )
 
-        for line in self._lines:
-            color_role = QtGui.QPalette.ColorRole.Text
-
-            qstyleoption = QtWidgets.QStyleOptionViewItem()
-            qstyleoption.initFrom(self)
-            line.apply_on_qstyle_option(
-                qstyleoption, apply_alternate=self._alternating_row_colors
-            )
-
-            if line.selected:
-                # we draw first using the palette so if no stylesheet, we still
-                # have an effect visible
-                highlight_color = self.palette().text()
-                highlight_color.setColor(
-                    QtGui.QColor(*highlight_color.color().toTuple()[:-1], 30)
+        ratio = self.devicePixelRatioF()
+        # the screen changed
+        if ratio != self._render_cache_ratio:
+            self._clear_render_cache()
+            self._render_cache_ratio = ratio
+
+        palette = self.palette()
+        text_color = palette.color(QtGui.QPalette.ColorRole.Text)
+        highlighted_text_color = palette.color(QtGui.QPalette.ColorRole.HighlightedText)
+        marker_brush = palette.highlight()
+
+        event_rect = event.rect()
+        lines = self._lines.get_lines_between(event_rect.top(), event_rect.bottom())
+
+        for line in lines:
+            line_geometry = self._lines.map_geometry(line)
+            if self._item_backgrounds_enabled:
+                cell_rect = line_geometry.toRect()
+                qpainter.drawPixmap(
+                    cell_rect.topLeft(),
+                    self._get_cell_pixmap(line, cell_rect.size()),
                 )
-                qpainter.fillRect(line.geometry, highlight_color)
-                color_role = QtGui.QPalette.ColorRole.HighlightedText
-
-            # draw line's cell
-            self.style().drawPrimitive(
-                QtWidgets.QStyle.PE_PanelItemViewItem,
-                qstyleoption,
-                qpainter,
-                self,
-            )
 
-            text_geo = line.geometry.adjusted(
+            text_geo = line_geometry.adjusted(
                 self.margins_side,
                 0,
                 -self.margins_side,
                 0,
             )
-
-            self.style().drawItemText(
-                qpainter,
-                text_geo.toRect(),
-                QtCore.Qt.AlignRight,
-                self.palette(),
-                True,
-                str(line.number + 1),
-                color_role,
+            if line.number in self._marked_lines:
+                marker_geometry = QtCore.QRectF(line_geometry)
+                marker_geometry.setWidth(3)
+                qpainter.fillRect(marker_geometry, marker_brush)
+
+            static_text = self._get_number_text(line.number)
+            qpainter.setPen(highlighted_text_color if line.selected else text_color)
+            # right aligned
+            qpainter.drawStaticText(
+                QtCore.QPointF(
+                    text_geo.right() - static_text.size().width(),
+                    text_geo.top(),
+                ),
+                static_text,
             )
+
+        self._instrumentation.stop("paint_sidebar", start_time, len(lines))
@@ -0,0 +1,132 @@
+import logging
+import time
+from typing import Optional
+from typing import Union
+
+from Qt import QtGui
+from Qt import QtCore
+from Qt import QtWidgets
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class RepaintScheduler(QtCore.QObject):
+    """
+    Merge the repaint requests of multiple widgets and perform them at most once
+    per display frame.
+
+    Requests are stored as a region per widget, and flushed with a single
+    ``update()`` per widget on the next frame.
+
+    Args:
+        parent: QObject owning this scheduler.
+        frame_rate: maximum number of flush per second. Default to the refresh
+            rate of the primary screen.
+    """
+
+    def __init__(self, parent=None, frame_rate: Optional[float] = None):
+        super().__init__(parent)
+
+        if not frame_rate:
+            screen = QtGui.QGuiApplication.primaryScreen()
+            frame_rate = screen.refreshRate() if screen else None
+
+        self._frame_interval: float = 1.0 / (frame_rate or 60.0)
+        self._last_flush_time: float = 0.0
+
+        # widget id: (widget, region to update or None for the whole widget)
+        self._pending: dict[int, tuple[QtWidgets.QWidget, Optional[QtGui.QRegion]]]
+        self._pending = {}
+
+        self._requested: int = 0
+        self._performed: int = 0
+        self._frames: int = 0
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        - ``requested``: number of repaint requested since last reset
+        - ``performed``: number of widget ``update()`` actually issued
+        - ``frames``: number of time the pending requests were flushed
+        """
+        return {
+            "requested": self._requested,
+            "performed": self._performed,
+            "frames": self._frames,
+        }
+
+    def flush(self):
+        """
+        Immediately issue all the pending repaint requests.
+        """
+        self._timer.stop()
+        pending = self._pending
+        self._pending = {}
+        self._last_flush_time = time.perf_counter()
+        self._frames += 1
+
+        for widget, region in pending.values():
+            if region is None:
+                widget.update()
+            else:
+                widget.update(region)
+            self._performed += 1
+
+    def request(
+        self,
+        widget: QtWidgets.QWidget,
+        rect: Union[QtCore.QRect, QtCore.QRectF, None] = None,
+    ):
+        """
+        Ask for the given widget to be repainted on the next frame.
+
+        Args:
+            widget: widget to repaint
+            rect: area of the widget to repaint, None for the whole widget.
+        """
+        self._requested += 1
+        key = id(widget)
+
+        if key in self._pending:
+            region = self._pending[key][1]
+            # whole widget already requested
+            if region is None:
+                return
+        else:
+            region = QtGui.QRegion()
+
+        if rect is None:
+            region = None
+        else:
+            if isinstance(rect, QtCore.QRectF):
+                rect = rect.toAlignedRect()
+            region = region.united(rect)
+
+        self._pending[key] = (widget, region)
+
+        if not self._timer.isActive():
+            elapsed = time.perf_counter() - self._last_flush_time
+            delay = max(self._frame_interval - elapsed, 0.0)
+            self._timer.start(int(delay * 1000))
+
+    def scroll(self, widget: QtWidgets.QWidget, dx: int, dy: int):
+        """
+        Scroll the already painted content of the widget, so only the exposed area
+        is repainted, and move its pending repaint region accordingly.
+        """
+        key = id(widget)
+        if key in self._pending:
+            region = self._pending[key][1]
+            if region is not None:
+                self._pending[key] = (widget, region.translated(dx, dy))
+        widget.scroll(dx, dy)
+
+    def reset_stats(self):
+        self._requested = 0
+        self._performed = 0
+        self._frames = 0
@@ -0,0 +1,211 @@
+import array
+import bisect
+import logging
+import re
+from typing import Optional
+
+from Qt import QtCore
+from Qt import QtGui
+
+from lqtTextEditor._worker import LineChunkWorker
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class FindMatchIndex:
+    """
+    Sorted collection of the text spans matching a search.
+
+    Matches are stored as line number, column and length in compact arrays, so
+    millions of matches stay cheap, and are looked up with bisect.
+
+    Line numbers and columns starts at 0.
+    """
+
+    def __init__(self):
+        self._lines = array.array("q")
+        self._columns = array.array("q")
+        self._lengths = array.array("q")
+
+    def __len__(self):
+        return len(self._lines)
+
+    def add_matches(self, matches: list[tuple[int, int, int]]):
+        """
+        Append the given matches, that must be after the ones already stored.
+
+        Args:
+            matches: list of ``(line, column, length)``
+        """
+        for line, column, length, *_ in matches:
+            self._lines.append(line)
+            self._columns.append(column)
+            self._lengths.append(length)
+
+    def clear(self):
+        self._lines = array.array("q")
+        self._columns = array.array("q")
+        self._lengths = array.array("q")
+
+    def get_match(self, index: int) -> tuple[int, int, int]:
+        """
+        Returns:
+            ``(line, column, length)`` of the match at the given index.
+        """
+        return self._lines[index], self._columns[index], self._lengths[index]
+
+    def get_matches_between(
+        self,
+        first_line: int,
+        last_line: int,
+    ) -> list[tuple[int, int, int]]:
+        """
+        Get the matches starting on the given lines, ``last_line`` included.
+        """
+        start = bisect.bisect_left(self._lines, first_line)
+        end = bisect.bisect_right(self._lines, last_line)
+        return [self.get_match(index) for index in range(start, end)]
+
+    def replace_lines(
+        self,
+        first_line: int,
+        last_line: int,
+        line_delta: int,
+        matches: list[tuple[int, int, int]],
+    ):
+        """
+        Replace the matches of the given lines after they were modified, and
+        renumber the matches of the following lines.
+
+        Args:
+            first_line: first line modified.
+            last_line: last line modified, included, as numbered before the
+                modification.
+            line_delta: number of lines added by the modification, negative if
+                removed.
+            matches: list of ``(line, column, length)`` found on the modified lines,
+                as numbered after the modification.
+        """
+        start = bisect.bisect_left(self._lines, first_line)
+        end = bisect.bisect_right(self._lines, last_line)
+
+        following_lines = self._lines[end:]
+        if line_delta:
+            following_lines = array.array(
+                "q", [line + line_delta for line in following_lines]
+            )
+        new_lines = array.array("q", [match[0] for match in matches])
+        self._lines[start:] = new_lines + following_lines
+        self._columns[start:end] = array.array("q", [match[1] for match in matches])
+        self._lengths[start:end] = array.array("q", [match[2] for match in matches])
+
+    def get_next_index(self, line: int, column: int) -> Optional[int]:
+        """
+        Get the index of the first match starting after the given position.
+        """
+        line_start = bisect.bisect_left(self._lines, line)
+        line_end = bisect.bisect_right(self._lines, line)
+        index = bisect.bisect_right(self._columns, column, line_start, line_end)
+        return index if index < len(self._lines) else None
+
+    def get_previous_index(self, line: int, column: int) -> Optional[int]:
+        """
+        Get the index of the last match starting before the given position.
+        """
+        line_start = bisect.bisect_left(self._lines, line)
+        line_end = bisect.bisect_right(self._lines, line)
+        index = bisect.bisect_left(self._columns, column, line_start, line_end) - 1
+        return index if index >= 0 else None
+
+
+def find_in_lines(
+    lines: list[str],
+    first_line: int,
+    pattern: re.Pattern,
+    replacement: Optional[str] = None,
+) -> list[tuple]:
+    """
+    Find all the spans matching a regex pattern in each of the given lines.
+
+    Lines are searched separately, so ``^`` and ``$`` match at the start and end of
+    each line and a match cannot span lines.
+
+    Args:
+        lines: lines to search, without line ending.
+        first_line: line number of the first line.
+        pattern: compiled regex to find. Empty matches are ignored.
+        replacement: if not None, also compute the text replacing each match, with
+            the same syntax as :func:`re.sub`.
+
+    Returns:
+        list of ``(line, column, length)``. If a replacement was given, each match
+        also contains the replacement text and the number of lines it adds.
+    """
+    search = pattern.search
+    matches = []
+    for index, line in enumerate(lines):
+        # most lines don't match
+        if not search(line):
+            continue
+
+        line_number = first_line + index
+        for match in pattern.finditer(line):
+            start, end = match.span()
+            if start == end:
+                continue
+            if replacement is None:
+                matches.append((line_number, start, end - start))
+                continue
+            new_text = match.expand(replacement)
+            matches.append(
+                (line_number, start, end - start, new_text, new_text.count("\n"))
+            )
+    return matches
+
+
+class FindWorker(LineChunkWorker):
+    """
+    Find all the spans of a document matching a regex pattern, in a separate
+    thread.
+
+    The document is searched line by line with :func:`find_in_lines`, by chunks of
+    lines. The matches of each chunk are emitted with :attr:`chunk_processed` as
+    soon as available.
+
+    Args:
+        document: document to search.
+        pattern: compiled regex to find. Empty matches are ignored.
+        replacement: if not None, also compute the text replacing each match, with
+            the same syntax as :func:`re.sub`.
+        chunk_length: approximate number of characters processed per chunk.
+        parent: QObject owning this thread.
+    """
+
+    chunk_processed = QtCore.Signal(int, object)
+    """
+    last line number of the chunk (included), list of matches as returned by
+    :func:`find_in_lines`.
+    """
+
+    def __init__(
+        self,
+        document: QtGui.QTextDocument,
+        pattern: re.Pattern,
+        replacement: Optional[str] = None,
+        chunk_length: int = 2**20,
+        parent=None,
+    ):
+        super().__init__(document, chunk_length=chunk_length, parent=parent)
+        self._pattern = pattern
+        self._replacement = replacement
+
+    def run(self):
+        for line_number, lines in self.iter_line_chunks():
+            matches = find_in_lines(
+                lines,
+                line_number,
+                self._pattern,
+                self._replacement,
+            )
+            self.chunk_processed.emit(line_number + len(lines) - 1, matches)
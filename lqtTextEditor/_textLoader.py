@@ -0,0 +1,147 @@
+import logging
+import os
+import queue
+from pathlib import Path
+from typing import Iterable
+from typing import Optional
+from typing import Union
+
+from Qt import QtCore
+
+from lqtTextEditor._worker import CancellableThread
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class TextLoaderWorker(CancellableThread):
+    """
+    Read and decode text from a file or an iterable of lines in a separate thread.
+
+    The text is split in batches put in a bounded queue, that must be consumed
+    by the GUI thread with :meth:`get_batch` when :attr:`batch_ready` is emitted.
+    The end of the text is signaled by a ``None`` batch, after which :attr:`error`
+    can be checked.
+
+    Args:
+        source: path of a file to read, or an iterable of lines. Lines can include
+            their line ending or not.
+        encoding: encoding used to decode a file.
+        errors: how decoding errors are handled, see :func:`open`.
+        batch_length: approximate number of characters per batch.
+        max_batches: number of batches that can wait in the queue before the
+            reading is paused.
+        parent: QObject owning this thread.
+    """
+
+    batch_ready = QtCore.Signal()
+    """
+    A batch was put in the queue, including the final ``None`` one.
+    """
+
+    def __init__(
+        self,
+        source: Union[str, Path, Iterable[str]],
+        encoding: str = "utf-8",
+        errors: str = "replace",
+        batch_length: int = 2**18,
+        max_batches: int = 8,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self._source = source
+        self._encoding = encoding
+        self._errors = errors
+        self._batch_length = batch_length
+        self._queue: queue.Queue = queue.Queue(maxsize=max_batches)
+
+        self.error: Optional[Exception] = None
+        """
+        exception that stopped the reading if any
+        """
+
+        self.progress: int = 0
+        """
+        number of bytes read for files, number of lines read for iterables
+        """
+
+        self.total: int = -1
+        """
+        total number of bytes of a file, -1 for iterables.
+        """
+
+        if isinstance(source, (str, Path)):
+            self.total = os.path.getsize(source)
+
+    def get_batch(self) -> Union[str, None, bool]:
+        """
+        Get the next batch of text without blocking.
+
+        Returns:
+            the text, None if all the text was read, False if no batch is available
+            yet.
+        """
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            return False
+
+    def _put(self, batch: Optional[str]) -> bool:
+        """
+        Block until the batch could be put in the queue.
+
+        Returns:
+            False if the worker was cancelled meanwhile.
+        """
+        while not self._cancelled:
+            try:
+                self._queue.put(batch, timeout=0.1)
+            except queue.Full:
+                continue
+            self.batch_ready.emit()
+            return True
+        return False
+
+    def _read_file(self, path: Union[str, Path]):
+        # universal newlines as QTextDocument create a block for each \r
+        with open(path, "r", encoding=self._encoding, errors=self._errors) as file:
+            while not self._cancelled:
+                batch = file.read(self._batch_length)
+                if not batch:
+                    return
+                self.progress = file.buffer.tell()
+                if not self._put(batch):
+                    return
+
+    def _read_lines(self, lines: Iterable[str]):
+        batch = []
+        batch_length = 0
+        # batches are appended to each other so a separator is needed in between
+        separator = ""
+
+        for line in lines:
+            if self._cancelled:
+                return
+            line = line.rstrip("\r\n")
+            batch.append(line)
+            batch_length += len(line) + 1
+            self.progress += 1
+            if batch_length >= self._batch_length:
+                if not self._put(separator + "\n".join(batch)):
+                    return
+                separator = "\n"
+                batch = []
+                batch_length = 0
+
+        if batch:
+            self._put(separator + "\n".join(batch))
+
+    def run(self):
+        try:
+            if isinstance(self._source, (str, Path)):
+                self._read_file(self._source)
+            else:
+                self._read_lines(self._source)
+        except Exception as error:
+            self.error = error
+        self._put(None)
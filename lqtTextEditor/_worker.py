@@ -0,0 +1,135 @@
+import logging
+import queue
+from typing import Iterator
+
+from Qt import QtCore
+from Qt import QtGui
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class CancellableThread(QtCore.QThread):
+    """
+    Thread whose processing can be asked to stop from any thread.
+
+    Subclasses are responsible for regularly checking :attr:`cancelled`.
+
+    Args:
+        parent: QObject owning this thread.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cancelled = False
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    def cancel(self):
+        """
+        Stop processing as soon as possible. Thread-safe.
+        """
+        self._cancelled = True
+
+    def dispose(self):
+        """
+        Delete this thread once control returns to the event loop.
+
+        The thread is detached from its parent first, as its connections may hold the
+        last references to the parent, which would then be deleted along with it.
+        """
+        self.setParent(None)
+        self.deleteLater()
+
+
+class LineChunkWorker(CancellableThread):
+    """
+    Process the lines of a document by chunks, in a separate thread.
+
+    Blocks can't be read from another thread, so the lines are read in the GUI
+    thread, one chunk per event loop iteration, and queued to be processed by
+    :meth:`iter_line_chunks` in ``run``.
+
+    Args:
+        document: document whose blocks are the lines to process.
+        first_line: number of the first line to process.
+        last_line: number of the last line to process, included, -1 for the last
+            line of the document.
+        chunk_length: approximate number of characters per chunk.
+        parent: QObject owning this thread.
+    """
+
+    def __init__(
+        self,
+        document: QtGui.QTextDocument,
+        first_line: int = 0,
+        last_line: int = -1,
+        chunk_length: int = 2**20,
+        parent=None,
+    ):
+        super().__init__(parent)
+        self._document = document
+        self._next_line = first_line
+        self._last_line = last_line
+        self._chunk_length = chunk_length
+        self._chunks: queue.Queue = queue.Queue()
+
+        self._read_timer = QtCore.QTimer(self)
+        self._read_timer.setInterval(0)
+        self._read_timer.timeout.connect(self.read_chunk)
+
+    def read_chunk(self) -> bool:
+        """
+        Queue the next chunk of lines of the document. Must be called from the GUI
+        thread.
+
+        Returns:
+            False once all the lines were queued or the processing cancelled.
+        """
+        document = self._document
+        last_line = self._last_line
+        if last_line < 0 or last_line >= document.blockCount():
+            last_line = document.blockCount() - 1
+
+        if self._cancelled or self._next_line > last_line:
+            self._read_timer.stop()
+            self._chunks.put(None)
+            return False
+
+        block = document.findBlockByNumber(self._next_line)
+        last_block = document.findBlock(block.position() + self._chunk_length)
+        if not last_block.isValid() or last_block.blockNumber() > last_line:
+            last_block = document.findBlockByNumber(last_line)
+
+        cursor = QtGui.QTextCursor(block)
+        cursor.setPosition(
+            last_block.position() + last_block.length() - 1,
+            cursor.KeepAnchor,
+        )
+        # blocks are separated by U+2029, U+2028 is a line break inside a block
+        lines = cursor.selectedText().split("\u2029")
+        self._chunks.put((self._next_line, lines))
+        self._next_line += len(lines)
+        return True
+
+    def iter_line_chunks(self) -> Iterator[tuple[int, list[str]]]:
+        """
+        Get the chunks of lines as they are read, until all were read or cancelled.
+
+        Yields:
+            number of the first line of the chunk, starting from 0, and its lines.
+        """
+        while not self._cancelled:
+            try:
+                chunk = self._chunks.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            if chunk is None:
+                return
+            yield chunk
+
+    def start(self, *args):
+        super().start(*args)
+        self._read_timer.start()
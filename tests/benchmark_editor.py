@@ -0,0 +1,412 @@
+"""
+Benchmark of the LinePlainTextEdit hot paths, runnable without a display.
+
+Usage::
+
+    python tests/benchmark_editor.py --output results.json
+    python tests/benchmark_editor.py --save-baseline
+    python tests/benchmark_editor.py --sizes 1000 10000 --threshold 1.5
+
+Each benchmark is run for each document size and the best time of all repeats is
+kept. The results are compared to the baseline stored next to this file (once
+created with ``--save-baseline``), and the script exits with an error code if any
+benchmark is slower than the baseline by more than the threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+# must be set before the QApplication is created
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from Qt import QtCore
+from Qt import QtGui
+from Qt import QtWidgets
+import Qt
+
+import lqtTextEditor
+
+
+BASELINE_PATH = Path(__file__).parent / "benchmark_baseline.json"
+# constructors of the input events taking only a local position are deprecated in Qt6
+QT_MAJOR_VERSION = int(QtCore.qVersion().split(".")[0])
+
+demoText = """one barbatus, fortis frondators virtualiter anhelare de rusticus, azureus castor.
+two messis cito ducunt ad clemens visus.
+three fidelis, clemens amors recte locus de pius, brevis navis.
+four trabem cito ducunt ad altus cursus.
+	magnum, secundus homos aliquando prensionem de placidus, bi-color magister.
+cum rumor tolerare, omnes cottaes pugna noster, albus brabeutaes.
+ubi est azureus pes?
+    resistere patienter ducunt ad flavum adiurator.
+"""
+
+BENCHMARKS: dict[str, Callable[[lqtTextEditor.LinePlainTextEdit, int], float]] = {}
+
+
+def benchmark(function):
+    """
+    Register the given function as benchmark.
+
+    The function receives an editor already filled with the document and must
+    return the time in seconds of only the measured operation.
+    """
+    BENCHMARKS[function.__name__.replace("bench_", "")] = function
+    return function
+
+
+def build_text(line_count: int) -> str:
+    lines = demoText.splitlines()
+    repeat = line_count // len(lines) + 1
+    return "\n".join((lines * repeat)[:line_count])
+
+
+def process_events():
+    QtWidgets.QApplication.processEvents()
+
+
+def send_hover(widget: QtWidgets.QWidget, position: QtCore.QPoint):
+    # the widgets read the global cursor position instead of the event position
+    QtGui.QCursor.setPos(widget.mapToGlobal(position))
+    local_position = QtCore.QPointF(position)
+    if QT_MAJOR_VERSION >= 6:
+        global_position = QtCore.QPointF(widget.mapToGlobal(position))
+        event = QtGui.QHoverEvent(
+            QtCore.QEvent.HoverMove, local_position, global_position, local_position
+        )
+    else:
+        event = QtGui.QHoverEvent(
+            QtCore.QEvent.HoverMove, local_position, local_position
+        )
+    QtWidgets.QApplication.sendEvent(widget, event)
+
+
+def send_mouse(widget: QtWidgets.QWidget, event_type, position: QtCore.QPoint):
+    QtGui.QCursor.setPos(widget.mapToGlobal(position))
+    buttons = QtCore.Qt.LeftButton
+    if event_type == QtCore.QEvent.MouseButtonRelease:
+        buttons = QtCore.Qt.NoButton
+    event = QtGui.QMouseEvent(
+        event_type,
+        QtCore.QPointF(position),
+        QtCore.QPointF(widget.mapToGlobal(position)),
+        QtCore.Qt.LeftButton,
+        buttons,
+        QtCore.Qt.NoModifier,
+    )
+    QtWidgets.QApplication.sendEvent(widget, event)
+
+
+def send_key(widget: QtWidgets.QWidget, key, modifiers=QtCore.Qt.NoModifier):
+    event = QtGui.QKeyEvent(QtCore.QEvent.KeyPress, key, modifiers)
+    QtWidgets.QApplication.sendEvent(widget, event)
+
+
+@benchmark
+def bench_set_plain_text(editor: lqtTextEditor.LinePlainTextEdit, line_count: int):
+    text = build_text(line_count)
+    start_time = time.perf_counter()
+    editor.setPlainText(text)
+    process_events()
+    return time.perf_counter() - start_time
+
+
+@benchmark
+def bench_hide_lines(editor: lqtTextEditor.LinePlainTextEdit, line_count: int):
+    lines = list(range(line_count // 4, line_count))
+    start_time = time.perf_counter()
+    editor.hide_lines(lines)
+    process_events()
+    return time.perf_counter() - start_time
+
+
+@benchmark
+def bench_show_lines(editor: lqtTextEditor.LinePlainTextEdit, line_count: int):
+    editor.hide_lines(list(range(line_count // 4, line_count)))
+    process_events()
+    start_time = time.perf_counter()
+    editor.show_lines()
+    process_events()
+    return time.perf_counter() - start_time
+
+
+@benchmark
+def bench_isolate_lines(editor: lqtTextEditor.LinePlainTextEdit, line_count: int):
+    lines = list(range(5, line_count * 9 // 10))
+    start_time = time.perf_counter()
+    editor.isolate_lines(lines)
+    process_events()
+    return time.perf_counter() - start_time
+
+
+@benchmark
+def bench_scroll_hidden_tail(
+    editor: lqtTextEditor.LinePlainTextEdit,
+    line_count: int,
+):
+    editor.hide_lines(list(range(25, line_count)))
+    process_events()
+    scrollbar = editor.verticalScrollBar()
+    start_time = time.perf_counter()
+    scrollbar.setValue(scrollbar.maximum())
+    process_events()
+    return time.perf_counter() - start_time
+
+
+@benchmark
+def bench_hover_storm(editor: lqtTextEditor.LinePlainTextEdit, line_count: int):
+    viewport = editor.viewport()
+    positions = [
+        QtCore.QPoint(viewport.width() // 2, y) for y in range(0, viewport.height(), 3)
+    ]
+    start_time = time.perf_counter()
+    for position in positions:
+        send_hover(editor, position)
+        process_events()
+    return time.perf_counter() - start_time
+
+
+@benchmark
+def bench_scroll_sequence(editor: lqtTextEditor.LinePlainTextEdit, line_count: int):
+    scrollbar = editor.verticalScrollBar()
+    step = max(scrollbar.maximum() // 200, 1)
+    start_time = time.perf_counter()
+    for value in range(0, scrollbar.maximum(), step):
+        scrollbar.setValue(value)
+        process_events()
+    return time.perf_counter() - start_time
+
+
+@benchmark
+def bench_sidebar_drag_selection(
+    editor: lqtTextEditor.LinePlainTextEdit,
+    line_count: int,
+):
+    sidebar = editor.findChild(lqtTextEditor.LineSideBarWidget)
+    x = sidebar.width() // 2
+    start_time = time.perf_counter()
+    send_mouse(sidebar, QtCore.QEvent.MouseButtonPress, QtCore.QPoint(x, 5))
+    for y in range(5, sidebar.height(), 4):
+        send_mouse(sidebar, QtCore.QEvent.MouseMove, QtCore.QPoint(x, y))
+        process_events()
+    send_mouse(sidebar, QtCore.QEvent.MouseButtonRelease, QtCore.QPoint(x, y))
+    process_events()
+    return time.perf_counter() - start_time
+
+
+@benchmark
+def bench_indent_selection(editor: lqtTextEditor.LinePlainTextEdit, line_count: int):
+    editor.selectAll()
+    start_time = time.perf_counter()
+    send_key(editor, QtCore.Qt.Key_Tab)
+    process_events()
+    return time.perf_counter() - start_time
+
+
+@benchmark
+def bench_unindent_selection(
+    editor: lqtTextEditor.LinePlainTextEdit,
+    line_count: int,
+):
+    editor.selectAll()
+    send_key(editor, QtCore.Qt.Key_Tab)
+    process_events()
+    editor.selectAll()
+    start_time = time.perf_counter()
+    send_key(editor, QtCore.Qt.Key_Backtab, QtCore.Qt.ShiftModifier)
+    process_events()
+    return time.perf_counter() - start_time
+
+
+@benchmark
+def bench_paint_editor(editor: lqtTextEditor.LinePlainTextEdit, line_count: int):
+    viewport = editor.viewport()
+    start_time = time.perf_counter()
+    for _ in range(20):
+        viewport.repaint()
+    return (time.perf_counter() - start_time) / 20
+
+
+@benchmark
+def bench_paint_sidebar(editor: lqtTextEditor.LinePlainTextEdit, line_count: int):
+    sidebar = editor.findChild(lqtTextEditor.LineSideBarWidget)
+    start_time = time.perf_counter()
+    for _ in range(20):
+        sidebar.repaint()
+    return (time.perf_counter() - start_time) / 20
+
+
+@benchmark
+def bench_paint_cost_per_line(
+    editor: lqtTextEditor.LinePlainTextEdit,
+    line_count: int,
+):
+    """
+    Time of painting the background of a single line item, with a small font to
+    have more than 150 lines visible.
+    """
+    # the stylesheet takes precedence over setFont
+    editor.setStyleSheet(
+        editor.styleSheet() + "\nQWidget.LinePlainTextEdit { font-size: 6px; }"
+    )
+    process_events()
+    instrumentation = editor.instrumentation
+    instrumentation.reset_stats()
+    instrumentation.set_enabled(True)
+    for _ in range(20):
+        editor.viewport().repaint()
+    instrumentation.set_enabled(False)
+    stats = instrumentation.stats["paint_lines"]
+    return stats["total"] / max(stats["lines"], 1)
+
+
+def create_editor(
+    line_count: int,
+    size: QtCore.QSize,
+) -> lqtTextEditor.LinePlainTextEdit:
+    editor = lqtTextEditor.LinePlainTextEdit()
+    stylesheet = Path(__file__).parent / "theme.dark-test.qss"
+    editor.setStyleSheet(stylesheet.read_text())
+    editor.set_alternating_row_colors(True)
+    editor.setPlainText(build_text(line_count))
+    editor.resize(size)
+    editor.show()
+    process_events()
+    return editor
+
+
+def run(
+    names: list[str],
+    sizes: list[int],
+    repeat: int,
+    editor_size: QtCore.QSize,
+) -> dict[str, dict[str, float]]:
+    """
+    Returns:
+        best time in seconds per benchmark name, then per document size.
+    """
+    results = {}
+    for name in names:
+        function = BENCHMARKS[name]
+        results[name] = {}
+        for size in sizes:
+            timings = []
+            for _ in range(repeat):
+                editor = create_editor(size, editor_size)
+                timings.append(function(editor, size))
+                editor.close()
+                editor.deleteLater()
+                process_events()
+            results[name][str(size)] = min(timings)
+            print(f"{name: <28} {size: >9} lines: {min(timings):.6f}s")
+    return results
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+) -> list[str]:
+    """
+    Returns:
+        description of each benchmark slower than the baseline by more than the
+        threshold ratio.
+    """
+    regressions = []
+    for name, timings in results.items():
+        for size, timing in timings.items():
+            reference = baseline.get(name, {}).get(size)
+            if not reference:
+                continue
+            ratio = timing / reference
+            if ratio > threshold:
+                regressions.append(
+                    f"{name} [{size} lines]: {timing:.6f}s vs {reference:.6f}s "
+                    f"(x{ratio:.2f})"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--benchmarks",
+        nargs="+",
+        choices=list(BENCHMARKS),
+        default=list(BENCHMARKS),
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=int,
+        default=[1000, 100000, 1000000],
+        help="number of lines of the documents to benchmark",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--editor-size",
+        nargs=2,
+        type=int,
+        default=[1600, 2400],
+        help="width and height of the editor widget",
+    )
+    parser.add_argument("--output", type=Path, help="json file to write results to")
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=BASELINE_PATH,
+        help="json file of results to compare against, skipped if it doesn't exist",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help=f"write the results as the new baseline to {BASELINE_PATH}",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.3,
+        help="ratio to the baseline from which a benchmark is a regression",
+    )
+    args = parser.parse_args(argv)
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv[:1])
+
+    results = run(
+        names=args.benchmarks,
+        sizes=args.sizes,
+        repeat=args.repeat,
+        editor_size=QtCore.QSize(*args.editor_size),
+    )
+    data = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "qt_binding": Qt.__binding__,
+        "qt_version": Qt.__qt_version__,
+        "results": results,
+    }
+
+    if args.output:
+        args.output.write_text(json.dumps(data, indent=4))
+    if args.save_baseline:
+        BASELINE_PATH.write_text(json.dumps(data, indent=4))
+
+    if not args.baseline.exists():
+        print(f"no baseline found at {args.baseline}, comparison skipped")
+    elif not args.save_baseline:
+        baseline = json.loads(args.baseline.read_text())["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+import os
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """
+    Application required by the tests using Qt widgets or signals, without display.
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from Qt import QtWidgets
+
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
@@ -0,0 +1,92 @@
+import time
+
+from Qt import QtGui
+
+from lqtTextEditor import LinePlainTextEdit
+from lqtTextEditor._blockMetadata import get_indent_width
+
+
+def create_editor(line_count: int) -> LinePlainTextEdit:
+    editor = LinePlainTextEdit()
+    editor.set_block_metadata_enabled(True)
+    editor.setPlainText("\n".join(f"    line {index}" for index in range(line_count)))
+    return editor
+
+
+def test_get_indent_width():
+    assert get_indent_width("", 4) == 0
+    assert get_indent_width("text  ", 4) == 0
+    assert get_indent_width("   ", 4) == 3
+    assert get_indent_width("    text", 4) == 4
+    assert get_indent_width("\ttext", 4) == 4
+    assert get_indent_width("\t\ttext", 2) == 4
+    # the tab stops at the next multiple of the tab size
+    assert get_indent_width("  \ttext", 4) == 4
+    assert get_indent_width("\t  text", 8) == 10
+
+
+def test_disabled_by_default(qapp):
+    editor = LinePlainTextEdit()
+    assert editor.block_metadata is None
+    editor.set_tab_character("  ")
+    editor.set_block_metadata_enabled(True)
+    assert editor.block_metadata.tab_size == 2
+    assert editor.block_metadata.pending_count == 0
+
+    editor = create_editor(10)
+    assert editor.block_metadata.get_metadata(3).length == len("    line 3")
+    editor.set_block_metadata_enabled(False)
+    assert editor.block_metadata is None
+    assert editor.document().findBlockByNumber(3).userData() is None
+
+
+def test_pending_lines(qapp):
+    editor = create_editor(500)
+    cache = editor.block_metadata
+    # a big change is computed in idle time
+    assert cache.pending_count == 500
+
+    # querying a pending line computes it immediately
+    metadata = cache.get_metadata(250)
+    assert metadata.indent_width == 4
+    assert metadata.length == len("    line 250")
+    assert cache.pending_count == 499
+    assert cache.get_metadata(500) is None
+
+    # the inserted lines are computed, the pending ones are shifted
+    cursor = QtGui.QTextCursor(editor.document())
+    cursor.insertText("\tnew\n")
+    assert cache.pending_count == 498
+    assert cache.get_metadata(0).indent_width == 4
+    assert cache.get_metadata(251).length == len("    line 250")
+    assert cache.pending_count == 498
+
+    filled = []
+    cache.filled.connect(lambda: filled.append(True))
+    end_time = time.time() + 5
+    while not filled and time.time() < end_time:
+        qapp.processEvents()
+    assert cache.pending_count == 0
+    assert cache.get_metadata(500).length == len("    line 499")
+
+    # all the lines must be computed again
+    editor.set_tab_character("  ")
+    assert cache.tab_size == 2
+    assert cache.pending_count == 501
+
+
+def test_flags_follow_lines(qapp):
+    editor = create_editor(20)
+    cache = editor.block_metadata
+    cache.set_flags(10, 3)
+
+    cursor = QtGui.QTextCursor(editor.document())
+    cursor.insertText("new\n")
+    assert cache.get_metadata(10).flags == 0
+    assert cache.get_metadata(11).flags == 3
+
+    # Qt keeps the first block when the top lines are trimmed
+    editor.set_maximum_line_count(10)
+    assert cache.get_metadata(0).flags == 3
+    assert cache.get_metadata(0).length == len("    line 10")
+    assert cache.get_metadata(1).flags == 0
@@ -0,0 +1,88 @@
+import time
+
+import pytest
+
+from lqtTextEditor import LinePlainTextEdit
+from lqtTextEditor._hugeFile import HugeFileIndex
+
+
+def build_index(path, segment_size: int) -> HugeFileIndex:
+    index = HugeFileIndex(path)
+    index.SEGMENT_SIZE = segment_size
+    while index.index_next_segment():
+        pass
+    return index
+
+
+@pytest.mark.parametrize("segment_size", [1, 2, 3, 7, 2**16])
+@pytest.mark.parametrize(
+    "content",
+    [
+        b"one\ntwo\nthree",
+        b"one\r\ntwo\r\nthree\r\n",
+        b"one\rtwo\r\rthree",
+        b"\r\n\none\r\r\ntwo\n\rthree\r",
+        "unicode éè\nline\r\n中文".encode("utf-8"),
+        b"",
+    ],
+)
+def test_lines_match_universal_newlines(tmp_path, content: bytes, segment_size):
+    path = tmp_path / "file.txt"
+    path.write_bytes(content)
+    with open(path, "r", encoding="utf-8") as file:
+        expected_lines = file.read().split("\n")
+
+    index = build_index(path, segment_size)
+    try:
+        assert index.complete
+        assert index.line_count == len(expected_lines)
+        assert index.read_text(0, index.line_count) == "\n".join(expected_lines)
+        for line_number, line in enumerate(expected_lines):
+            assert index.read_text(line_number, 1) == line
+        assert index.read_text(1, 2) == "\n".join(expected_lines[1:3])
+    finally:
+        index.close()
+
+
+def test_partial_index(tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_bytes(b"a\r\nb\r\nc\r\nd")
+
+    index = HugeFileIndex(path)
+    index.SEGMENT_SIZE = 4
+    try:
+        # "a\r\nb" has a single line break
+        assert index.index_next_segment()
+        assert index.line_count == 1
+        assert index.read_text(0, 10) == "a"
+        # "\r\nc\r" ends in the middle of a line break
+        assert index.index_next_segment()
+        assert index.line_count == 3
+        assert index.read_text(0, 10) == "a\nb\nc"
+        assert not index.index_next_segment()
+        assert index.line_count == 4
+        assert index.read_text(2, 10) == "c\nd"
+    finally:
+        index.close()
+
+
+def test_editor_jump_to_file_line(qapp, tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_text("\n".join(f"line {index}" for index in range(20000)))
+
+    editor = LinePlainTextEdit()
+    indexed = []
+    editor.huge_file_progress.connect(lambda done, total: indexed.append(done))
+    editor.open_huge_file(path)
+    end_time = time.time() + 5
+    while path.stat().st_size not in indexed and time.time() < end_time:
+        qapp.processEvents()
+
+    # the line is far outside of the lines first put in the document
+    editor.jump_to_line(15000)
+    assert editor.textCursor().block().text() == "line 15000"
+    assert editor.line_number_offset > 0
+
+    editor.jump_to_line(10**9)
+    assert editor.textCursor().block().text() == "line 19999"
+    editor.close_huge_file()
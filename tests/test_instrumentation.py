@@ -0,0 +1,41 @@
+import time
+
+from lqtTextEditor._instrumentation import Instrumentation
+
+
+def process_events(qapp, duration: float):
+    end_time = time.time() + duration
+    while time.time() < end_time:
+        qapp.processEvents()
+
+
+def test_record_stage(qapp):
+    instrumentation = Instrumentation()
+    instrumentation.stop("stage", instrumentation.start(), 5)
+    assert instrumentation.stats == {}
+
+    instrumentation.set_enabled(True)
+    for _ in range(2):
+        instrumentation.stop("stage", instrumentation.start(), 5)
+    stats = instrumentation.stats["stage"]
+    assert stats["calls"] == 2
+    assert stats["lines"] == 10
+    assert stats["max"] <= stats["total"]
+
+
+def test_report_only_while_enabled(qapp):
+    instrumentation = Instrumentation()
+    reports = []
+    instrumentation.stats_reported.connect(reports.append)
+    instrumentation.set_report_interval(1)
+    process_events(qapp, 0.05)
+    assert not reports
+
+    instrumentation.set_enabled(True)
+    process_events(qapp, 0.05)
+    assert reports
+
+    instrumentation.set_enabled(False)
+    reports.clear()
+    process_events(qapp, 0.05)
+    assert not reports
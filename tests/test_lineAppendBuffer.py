@@ -0,0 +1,63 @@
+import threading
+import time
+
+from lqtTextEditor import LinePlainTextEdit
+from lqtTextEditor._lineAppendBuffer import LineAppendBuffer
+
+
+def test_add_take():
+    buffer = LineAppendBuffer()
+    assert not buffer.add([])
+    assert buffer.add(["one\n", "two\r\n"])
+    assert not buffer.add(["three"])
+    assert len(buffer) == 3
+    assert buffer.take() == ["one", "two", "three"]
+    assert buffer.take() == []
+    buffer.add(["four"])
+    buffer.clear()
+    assert not len(buffer)
+
+
+def test_add_from_threads():
+    buffer = LineAppendBuffer()
+    threads = [
+        threading.Thread(target=buffer.add, args=([str(index)] * 1000,))
+        for index in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(buffer.take()) == 8000
+
+
+def test_append_with_maximum_line_count(qapp):
+    editor = LinePlainTextEdit()
+    editor.set_maximum_line_count(10)
+    editor.set_follow_mode(True)
+
+    editor.append_lines(f"line {index}" for index in range(25))
+    end_time = time.time() + 5
+    while not editor.line_number_offset and time.time() < end_time:
+        qapp.processEvents()
+
+    assert editor.blockCount() == 10
+    # the oldest lines are removed, but line numbers stay absolute
+    assert editor.line_number_offset == 15
+    assert editor.document().firstBlock().text() == "line 15"
+    assert editor.document().lastBlock().text() == "line 24"
+    editor.set_follow_mode(False)
+
+
+def test_append_from_thread(qapp):
+    editor = LinePlainTextEdit()
+    # the last empty line is used by the first line appended
+    editor.setPlainText("first\n")
+    thread = threading.Thread(target=editor.append_lines, args=(["a", "b"],))
+    thread.start()
+    thread.join()
+
+    end_time = time.time() + 5
+    while editor.blockCount() < 3 and time.time() < end_time:
+        qapp.processEvents()
+    assert editor.document().toPlainText() == "first\na\nb"
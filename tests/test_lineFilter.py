@@ -0,0 +1,36 @@
+import re
+import time
+
+from Qt import QtGui
+
+from lqtTextEditor import LinePlainTextEdit
+from lqtTextEditor._lineFilter import LineFilterWorker
+
+
+def test_worker_chunks(qapp):
+    document = QtGui.QTextDocument("\n".join(["a", "b", "ab", "c", "a"]))
+    for chunk_length in (1, 3, 2**20):
+        worker = LineFilterWorker(document, re.compile("a"), chunk_length)
+        chunks = []
+        worker.chunk_processed.connect(lambda *args: chunks.append(args))
+        while worker.read_chunk():
+            pass
+        worker.run()
+        assert chunks[-1][1] == 4
+        assert [line for chunk in chunks for line in chunk[2]] == [0, 2, 4]
+
+
+def test_editor_line_separator(qapp):
+    editor = LinePlainTextEdit()
+    # a line separator (shift+enter) doesn't start a new block
+    editor.setPlainText("b\u2028x\nzz\nc\na")
+    finished = []
+    editor.filter_finished.connect(finished.append)
+    editor.filter_lines("^a$")
+    end_time = time.time() + 5
+    while not finished and time.time() < end_time:
+        qapp.processEvents()
+    assert finished == [1]
+    document = editor.document()
+    visible = [document.findBlockByNumber(line).isVisible() for line in range(4)]
+    assert visible == [False, False, False, True]
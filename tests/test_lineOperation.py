@@ -0,0 +1,82 @@
+import re
+import time
+
+import pytest
+from Qt import QtGui
+
+from lqtTextEditor import LinePlainTextEdit
+from lqtTextEditor._lineOperation import LineOperationWorker
+from lqtTextEditor._lineOperation import dedupe_lines
+from lqtTextEditor._lineOperation import keep_lines_matching
+from lqtTextEditor._lineOperation import sort_lines
+
+TEXT = "\n".join(["c", "a", "b", "a", "hidden", "e", "d", "e"])
+
+
+@pytest.fixture
+def document(qapp) -> QtGui.QTextDocument:
+    return QtGui.QTextDocument(TEXT)
+
+
+def run_worker(worker: LineOperationWorker) -> list:
+    """
+    Run the worker in the current thread and get the emitted chunks.
+    """
+    results = []
+    worker.processed.connect(results.append)
+    while worker.read_chunk():
+        pass
+    worker.run()
+    return results
+
+
+def test_chunks_per_range(document):
+    worker = LineOperationWorker(document, [(0, 3), (5, 7)], sort_lines)
+    chunks = run_worker(worker)
+    # lines are processed together, then split back with the ranges length
+    assert chunks == [[["a", "a", "b", "c"], ["d", "e", "e"]]]
+
+
+def test_chunks_fewer_lines(document):
+    worker = LineOperationWorker(document, [(0, 3), (5, 7)], dedupe_lines)
+    assert run_worker(worker) == [[["c", "a", "b", "e"], ["d"]]]
+
+    pattern = re.compile("a")
+    worker = LineOperationWorker(
+        document, [(0, 3), (5, 7)], lambda lines: keep_lines_matching(lines, pattern)
+    )
+    assert run_worker(worker) == [[["a", "a"], []]]
+
+
+def test_chunks_more_lines(document):
+    worker = LineOperationWorker(document, [(0, 0), (5, 5)], lambda lines: lines * 3)
+    # lines in excess are all in the last range
+    assert run_worker(worker) == [[["c"], ["e", "c", "e", "c", "e"]]]
+
+
+def test_error_and_cancel(document):
+    def fail(lines):
+        raise ValueError("invalid")
+
+    worker = LineOperationWorker(document, [(0, 3)], fail)
+    assert run_worker(worker) == []
+    assert isinstance(worker.error, ValueError)
+
+    worker = LineOperationWorker(document, [(0, 3)], sort_lines)
+    worker.cancel()
+    assert run_worker(worker) == []
+    assert worker.error is None
+
+
+def test_editor_line_separator(qapp):
+    editor = LinePlainTextEdit()
+    # a line separator (shift+enter) doesn't start a new block
+    editor.setPlainText("b\u2028x\nzz\nc\na")
+    finished = []
+    editor.line_operation_finished.connect(finished.append)
+    editor.sort_lines(target="visible")
+    end_time = time.time() + 5
+    while not finished and time.time() < end_time:
+        qapp.processEvents()
+    assert finished == [True]
+    assert editor.document().toRawText() == "a\u2029b\u2028x\u2029c\u2029zz"
@@ -2,6 +2,7 @@ import contextlib
 import sys
 import time
 
+import pytest
 from Qt import QtCore
 from Qt import QtGui
 from Qt import QtWidgets
@@ -133,6 +134,423 @@ def test_qtwidgets():
     widget_main.show()
 
 
+def build_text(line_count: int) -> str:
+    lines = demoText.splitlines()
+    return "\n".join((lines * (line_count // len(lines) + 1))[:line_count])
+
+
+def wait(milliseconds: int = 50):
+    """
+    Process the events for the given duration, so the timers are triggered.
+    """
+    end_time = time.perf_counter() + milliseconds / 1000
+    while time.perf_counter() < end_time:
+        QtWidgets.QApplication.processEvents()
+        time.sleep(0.001)
+
+
+class PaintRecorder(QtCore.QObject):
+    """
+    Accumulate the area painted or resized of the given widget.
+    """
+
+    def __init__(self, widget: QtWidgets.QWidget):
+        super().__init__(widget)
+        self.region = QtGui.QRegion()
+        self.paints = 0
+        self.resizes = 0
+        widget.installEventFilter(self)
+
+    def clear(self):
+        self.region = QtGui.QRegion()
+        self.paints = 0
+        self.resizes = 0
+
+    def eventFilter(self, watched, event) -> bool:
+        if event.type() == QtCore.QEvent.Paint:
+            self.region = self.region.united(event.region())
+            self.paints += 1
+        elif event.type() == QtCore.QEvent.Resize:
+            self.resizes += 1
+        return False
+
+
+def create_editor(line_count: int) -> lqtTextEditor.LinePlainTextEdit:
+    editor = lqtTextEditor.LinePlainTextEdit()
+    # a scroll step is a block
+    editor.setLineWrapMode(editor.NoWrap)
+    editor.setPlainText(build_text(line_count))
+    editor.resize(400, 300)
+    editor.show()
+    wait()
+    return editor
+
+
+@pytest.fixture
+def editor(qapp):
+    editor = create_editor(1000)
+    yield editor
+    editor.close()
+    editor.deleteLater()
+    wait(0)
+
+
+def move_mouse(widget: QtWidgets.QWidget, position: QtCore.QPoint):
+    # the widgets read the global cursor position instead of the event position
+    QtGui.QCursor.setPos(widget.mapToGlobal(position))
+    local_position = QtCore.QPointF(position)
+    event = QtGui.QHoverEvent(QtCore.QEvent.HoverMove, local_position, local_position)
+    QtWidgets.QApplication.sendEvent(widget, event)
+
+
+def send_mouse(widget: QtWidgets.QWidget, event_type, position: QtCore.QPoint):
+    QtGui.QCursor.setPos(widget.mapToGlobal(position))
+    buttons = QtCore.Qt.LeftButton
+    if event_type == QtCore.QEvent.MouseButtonRelease:
+        buttons = QtCore.Qt.NoButton
+    event = QtGui.QMouseEvent(
+        event_type,
+        QtCore.QPointF(position),
+        QtCore.QPointF(widget.mapToGlobal(position)),
+        QtCore.Qt.LeftButton,
+        buttons,
+        QtCore.Qt.NoModifier,
+    )
+    QtWidgets.QApplication.sendEvent(widget, event)
+
+
+def get_line_center(editor, number: int) -> QtCore.QPoint:
+    """
+    Position of the given visible line, in the editor viewport coordinates.
+    """
+    return editor._lines.get_line_by_number(number).geometry.center().toPoint()
+
+
+def test_update_lines_on_scroll(editor):
+    line_count = len(editor._lines)
+    editor.reset_lines_update_stats()
+    editor.verticalScrollBar().setValue(3)
+    wait()
+
+    stats = editor.lines_update_stats
+    assert stats["full_updates"] == 0
+    assert stats["scroll_updates"] == 1
+    # only the lines exposed by the scroll are built
+    assert stats["rebuilt"] <= 4
+    assert stats["reused"] >= line_count - 4
+    assert next(iter(editor._lines)).number == 3
+
+
+def test_update_lines_hidden(editor):
+    editor.verticalScrollBar().setValue(5)
+    wait()
+    editor.hide_lines(list(range(8, 20)))
+    wait()
+
+    numbers = [line.number for line in editor._lines]
+    assert numbers[0] == editor.firstVisibleBlock().blockNumber()
+    assert numbers[:5] == [5, 6, 7, 20, 21]
+    assert numbers == [n for n in range(5, numbers[-1] + 1) if not 8 <= n < 20]
+
+
+def test_sidebar_shares_lines(editor):
+    editor.verticalScrollBar().setValue(4)
+    wait()
+
+    sidebar_lines = list(editor._sidebar._lines)
+    assert len(sidebar_lines) == len(editor._lines)
+    assert all(a is b for a, b in zip(sidebar_lines, editor._lines))
+
+
+def test_hover_repaint(editor):
+    viewport = editor.viewport()
+    move_mouse(editor, viewport.mapTo(editor, get_line_center(editor, 2)))
+    wait()
+    recorder = PaintRecorder(viewport)
+    move_mouse(editor, viewport.mapTo(editor, get_line_center(editor, 5)))
+    wait()
+
+    assert editor._lines.get_line_by_number(5).hovered
+    assert not editor._lines.get_line_by_number(2).hovered
+    # only the previous and new hovered lines are repainted
+    assert recorder.region.contains(get_line_center(editor, 2))
+    assert recorder.region.contains(get_line_center(editor, 5))
+    assert not recorder.region.contains(get_line_center(editor, 3))
+    assert not recorder.region.contains(get_line_center(editor, 10))
+
+
+def test_repaint_coalesced(editor):
+    scheduler = editor.repaint_scheduler
+    scheduler.reset_stats()
+    for line in range(10):
+        editor.jump_to_line(line)
+    wait()
+
+    # one update per widget
+    stats = scheduler.stats
+    assert stats["requested"] >= 10
+    assert stats["frames"] == 1
+    assert stats["performed"] <= 2
+
+
+def test_scroll_hidden_tail(qapp):
+    editor = create_editor(200000)
+    editor.hide_lines(list(range(25, 200000)))
+    wait()
+    scrollbar = editor.verticalScrollBar()
+
+    start_time = time.perf_counter()
+    scrollbar.setValue(scrollbar.maximum())
+    wait(0)
+    elapsed = time.perf_counter() - start_time
+
+    # hidden lines are skipped at once instead of being walked
+    assert elapsed < 0.5
+    assert list(editor._lines)[-1].number == 24
+    editor.close()
+    editor.deleteLater()
+
+
+def test_line_ranges_visibility(editor):
+    document = editor.document()
+
+    def get_hidden_lines():
+        block = document.firstBlock()
+        hidden = []
+        while block.isValid():
+            if not block.isVisible():
+                hidden.append(block.blockNumber())
+            block = block.next()
+        return hidden
+
+    editor.hide_line_ranges([range(10, 20), range(30, 40)])
+    assert get_hidden_lines() == [*range(10, 20), *range(30, 40)]
+
+    editor.show_line_ranges([range(15, 35)])
+    assert get_hidden_lines() == [*range(10, 15), *range(35, 40)]
+
+    editor.isolate_line_ranges([range(5, 8), range(990, 2000)])
+    assert get_hidden_lines() == [*range(5), *range(8, 990)]
+
+    editor.show_lines()
+    assert get_hidden_lines() == []
+
+
+def test_isolate_lines_duration(qapp):
+    editor = create_editor(100000)
+
+    start_time = time.perf_counter()
+    editor.isolate_lines(list(range(5, 90000)))
+    wait(0)
+    elapsed = time.perf_counter() - start_time
+
+    # the visibility of the blocks is changed in a single walk of the document
+    assert elapsed < 1.0
+    assert not editor.document().findBlockByNumber(4).isVisible()
+    assert editor.document().findBlockByNumber(5).isVisible()
+    assert not editor.document().findBlockByNumber(90000).isVisible()
+    editor.close()
+    editor.deleteLater()
+
+
+def test_sidebar_geometry_on_digit_change(qapp):
+    editor = create_editor(9995)
+    sidebar = editor._sidebar
+    recorder = PaintRecorder(sidebar)
+    width = sidebar.width()
+    cursor = QtGui.QTextCursor(editor.document())
+    cursor.movePosition(cursor.End)
+
+    cursor.insertText("\n" * 4)
+    wait()
+    assert recorder.resizes == 0
+    assert sidebar.width() == width
+
+    cursor.insertText("\n" * 10)
+    wait()
+    assert recorder.resizes == 1
+    assert sidebar.width() == width + sidebar.get_digit_width()
+    assert editor.viewportMargins().left() == sidebar.width()
+    editor.close()
+    editor.deleteLater()
+
+
+def test_sidebar_render_cache(editor):
+    sidebar = editor._sidebar
+    sidebar.repaint()
+    number_texts = dict(sidebar._number_texts)
+    cell_pixmaps = dict(sidebar._cell_pixmaps)
+    assert len(number_texts) >= len(editor._lines)
+    # lines in the same state share the same background
+    assert len(cell_pixmaps) < len(editor._lines)
+
+    sidebar.repaint()
+    assert sidebar._number_texts == number_texts
+    assert all(sidebar._cell_pixmaps[key] is cell_pixmaps[key] for key in cell_pixmaps)
+
+    sidebar.setFont(QtGui.QFont(sidebar.font().family(), 30))
+    assert not sidebar._number_texts
+    assert not sidebar._cell_pixmaps
+
+
+def test_paint_alternate_rows(editor):
+    editor.setStyleSheet(
+        "QWidget.LinePlainTextEdit::item { background-color: rgb(0, 0, 255); }"
+        "QWidget.LinePlainTextEdit::item:alternate { background-color: rgb(255, 0, 0); }"
+    )
+    editor.set_alternating_row_colors(True)
+    wait()
+
+    image = editor.viewport().grab().toImage()
+    colors = []
+    for number in range(1, 5):
+        geometry = editor._lines.get_line_by_number(number).geometry
+        # right edge, after the text
+        x = image.width() - 3
+        colors.append(QtGui.QColor(image.pixel(x, int(geometry.center().y()))))
+    # the style option reused between lines must not keep the previous line state
+    assert [color.red() > color.blue() for color in colors] == [True, False] * 2
+
+
+def test_sidebar_blit_scroll(editor):
+    sidebar = editor._sidebar
+    recorder = PaintRecorder(sidebar)
+    line_height = editor._lines.first_line.geometry.height()
+    editor.verticalScrollBar().setValue(1)
+    wait()
+
+    # the sidebar pixels are moved, only the exposed line and the lines whose
+    # style depends on their place in the viewport are painted
+    painted_height = sum(rect.height() for rect in recorder.region.rects())
+    assert recorder.paints >= 1
+    assert painted_height <= 6 * line_height < sidebar.height()
+
+
+def test_performance_profile(editor):
+    states = []
+    editor.reduced_styling_changed.connect(states.append)
+    editor.set_performance_profile(document_lines=500)
+    wait()
+    assert states == [True]
+    assert not editor._sidebar._item_backgrounds_enabled
+
+    # hover is not tracked
+    viewport = editor.viewport()
+    move_mouse(editor, viewport.mapTo(editor, get_line_center(editor, 2)))
+    assert not any(line.hovered for line in editor._lines)
+
+    editor.set_performance_profile(document_lines=0)
+    wait()
+    assert states == [True, False]
+    assert editor._sidebar._item_backgrounds_enabled
+
+
+def test_performance_profile_scroll_speed(editor):
+    states = []
+    editor.reduced_styling_changed.connect(states.append)
+    editor.set_performance_profile(scroll_speed=100, idle_delay=50)
+    scrollbar = editor.verticalScrollBar()
+    for value in range(0, 500, 50):
+        scrollbar.setValue(value)
+    assert states == [True]
+
+    wait(200)
+    assert states == [True, False]
+
+
+def test_sidebar_drag_auto_scroll(editor):
+    sidebar = editor._sidebar
+    scrollbar = editor.verticalScrollBar()
+    x = sidebar.width() // 2
+    send_mouse(sidebar, QtCore.QEvent.MouseButtonPress, QtCore.QPoint(x, 20))
+    first_line = sidebar.selection.anchor
+    send_mouse(
+        sidebar, QtCore.QEvent.MouseMove, QtCore.QPoint(x, sidebar.height() + 30)
+    )
+    wait(200)
+    send_mouse(sidebar, QtCore.QEvent.MouseButtonRelease, QtCore.QPoint(x, 20))
+    value = scrollbar.value()
+    wait(100)
+
+    assert value > 0
+    # stopped on release
+    assert scrollbar.value() == value
+    # the selection follows the last visible line while scrolling
+    start, end = sidebar.selection.active_range
+    assert start == first_line
+    assert end >= editor._lines.last_line.number - 1
+    assert editor.selected_lines_start == first_line
+
+
+def test_indent_single_undo_step(editor):
+    document = editor.document()
+    text = document.toPlainText()
+    cursor = QtGui.QTextCursor(document.findBlockByNumber(2))
+    cursor.setPosition(document.findBlockByNumber(6).position() + 3, cursor.KeepAnchor)
+    editor.setTextCursor(cursor)
+    assert not document.isUndoAvailable()
+
+    QtWidgets.QApplication.sendEvent(
+        editor,
+        QtGui.QKeyEvent(
+            QtCore.QEvent.KeyPress, QtCore.Qt.Key_Tab, QtCore.Qt.NoModifier
+        ),
+    )
+    lines = document.toPlainText().split("\n")
+    assert all(line.startswith("    ") for line in lines[2:7])
+    assert not lines[1].startswith(" ") and not lines[7].startswith(" ")
+
+    QtWidgets.QApplication.sendEvent(
+        editor,
+        QtGui.QKeyEvent(
+            QtCore.QEvent.KeyPress, QtCore.Qt.Key_Backtab, QtCore.Qt.ShiftModifier
+        ),
+    )
+    assert document.toPlainText() == text
+
+    document.undo()
+    assert document.toPlainText().split("\n") == lines
+    document.undo()
+    assert document.toPlainText() == text
+    assert not document.isUndoAvailable()
+
+
+class RecordingHighlighter(lqtTextEditor.LazyHighlighter):
+    def __init__(self):
+        self.texts: list[str] = []
+        self.text_format = QtGui.QTextCharFormat()
+        self.text_format.setFontWeight(QtGui.QFont.Bold)
+
+    def highlight_block(self, text: str, state: int):
+        self.texts.append(text)
+        return [(0, len(text), self.text_format)], state
+
+
+def test_lazy_highlighting(qapp):
+    editor = create_editor(10000)
+    document = editor.document()
+    highlighter = RecordingHighlighter()
+    editor.set_highlighter(highlighter)
+    # only highlight the blocks displayed
+    editor._highlight_scheduler.stop()
+
+    visible_count = len(editor._lines)
+    assert 0 < len(highlighter.texts) <= visible_count + editor._HIGHLIGHT_MARGIN + 1
+    assert document.firstBlock().layout().formats()
+    assert not document.findBlockByNumber(5000).layout().formats()
+
+    highlighter.texts.clear()
+    editor.verticalScrollBar().setValue(8000)
+    wait()
+    assert (
+        0 < len(highlighter.texts) <= visible_count + 2 * editor._HIGHLIGHT_MARGIN + 1
+    )
+    assert document.findBlockByNumber(8000).layout().formats()
+    assert not document.findBlockByNumber(5000).layout().formats()
+    editor.close()
+    editor.deleteLater()
+
+
 def main():
     test_main()
     test_qtwidgets()
@@ -0,0 +1,46 @@
+from lqtTextEditor._lineRanges import LineRangeSet
+
+
+def test_add_merge():
+    line_ranges = LineRangeSet()
+    line_ranges.add(5, 10)
+    line_ranges.add(20, 30)
+    line_ranges.add(11, 12)
+    assert list(line_ranges) == [(5, 12), (20, 30)]
+    line_ranges.add(8, 25)
+    assert list(line_ranges) == [(5, 30)]
+    assert line_ranges.count == 26
+
+
+def test_remove_split():
+    line_ranges = LineRangeSet()
+    line_ranges.add(0, 100)
+    line_ranges.remove(40, 50)
+    assert list(line_ranges) == [(0, 39), (51, 100)]
+    assert 45 not in line_ranges
+    assert 39 in line_ranges
+    assert line_ranges.next_outside(0) == 40
+    assert line_ranges.previous_outside(60) == 50
+    assert line_ranges.next_outside(45) == 45
+
+
+def test_shift():
+    line_ranges = LineRangeSet()
+    line_ranges.add(10, 20)
+    line_ranges.add(30, 40)
+    line_ranges.shift(25, 5)
+    assert list(line_ranges) == [(10, 20), (35, 45)]
+    line_ranges.shift(25, -5)
+    assert list(line_ranges) == [(10, 20), (30, 40)]
+    # removing the lines in between merge ranges
+    line_ranges.shift(20, -9)
+    assert list(line_ranges) == [(10, 31)]
+
+
+def test_ranges_between():
+    line_ranges = LineRangeSet()
+    line_ranges.add(10, 20)
+    line_ranges.add(30, 40)
+    assert line_ranges.ranges_between(15, 35) == [(15, 20), (30, 35)]
+    assert line_ranges.gaps_between(0, 50) == [(0, 9), (21, 29), (41, 50)]
+    assert line_ranges.gaps_between(10, 20) == []
@@ -0,0 +1,26 @@
+from lqtTextEditor._lineSelection import LineRangeSelection
+
+
+def test_start_extend():
+    selection = LineRangeSelection()
+    assert not selection
+    selection.start(10)
+    selection.extend(5)
+    assert selection.active_range == (5, 10)
+    assert list(selection) == [(5, 10)]
+    selection.start(20)
+    assert list(selection) == [(20, 20)]
+
+
+def test_add_ranges():
+    selection = LineRangeSelection()
+    selection.start(0)
+    selection.extend(10)
+    selection.start(20, add=True)
+    selection.extend(30)
+    selection.start(11, add=True)
+    assert list(selection) == [(0, 11), (20, 30)]
+    assert 25 in selection
+    assert 15 not in selection
+    assert selection.get_ranges_between(5, 25) == [(5, 11), (20, 25)]
+    assert selection.last_line == 30
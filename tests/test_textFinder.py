@@ -0,0 +1,151 @@
+import re
+import time
+
+from Qt import QtGui
+
+from lqtTextEditor import LinePlainTextEdit
+from lqtTextEditor._textFinder import FindMatchIndex
+from lqtTextEditor._textFinder import FindWorker
+from lqtTextEditor._textFinder import find_in_lines
+
+TEXT = "ERROR a\nINFO b\nERROR c ERROR\n\nERROR d"
+
+
+def run_worker(worker: FindWorker) -> list[tuple]:
+    """
+    Run the worker in the current thread and get all the matches found.
+    """
+    matches = []
+    worker.chunk_processed.connect(lambda last_line, chunk: matches.extend(chunk))
+    while worker.read_chunk():
+        pass
+    worker.run()
+    return matches
+
+
+def test_find_in_lines():
+    lines = TEXT.split("\n")
+    assert find_in_lines(lines, 10, re.compile("^ERROR")) == [
+        (10, 0, 5),
+        (12, 0, 5),
+        (14, 0, 5),
+    ]
+    assert find_in_lines(lines, 0, re.compile(r"\w+$")) == [
+        (0, 6, 1),
+        (1, 5, 1),
+        (2, 8, 5),
+        (4, 6, 1),
+    ]
+    # empty matches are ignored
+    assert find_in_lines(lines, 0, re.compile("x*")) == []
+
+
+def test_find_in_lines_replacement():
+    matches = find_in_lines(["a1 b2"], 0, re.compile(r"(\w)(\d)"), r"\2\n\1")
+    assert matches == [(0, 0, 2, "1\na", 1), (0, 3, 2, "2\nb", 1)]
+
+
+def test_worker_chunks(qapp):
+    pattern = re.compile("^ERROR|b$")
+    expected = find_in_lines(TEXT.split("\n"), 0, pattern)
+    assert len(expected) == 4
+    document = QtGui.QTextDocument(TEXT)
+    for chunk_length in (1, 5, 2**20):
+        worker = FindWorker(document, pattern, chunk_length=chunk_length)
+        assert run_worker(worker) == expected
+
+
+def test_worker_cancel(qapp):
+    document = QtGui.QTextDocument(TEXT)
+    worker = FindWorker(document, re.compile("ERROR"), chunk_length=1)
+    worker.chunk_processed.connect(lambda last_line, chunk: worker.cancel())
+    chunks = []
+    worker.chunk_processed.connect(lambda last_line, chunk: chunks.append(chunk))
+    assert run_worker(worker) == [(0, 0, 5)]
+    assert chunks == [[(0, 0, 5)]]
+
+
+def test_match_index():
+    index = FindMatchIndex()
+    index.add_matches([(1, 0, 2), (1, 5, 2), (4, 3, 1), (9, 0, 1)])
+    assert len(index) == 4
+    assert index.get_matches_between(1, 4) == [(1, 0, 2), (1, 5, 2), (4, 3, 1)]
+    assert index.get_next_index(1, 0) == 1
+    assert index.get_next_index(1, 5) == 2
+    assert index.get_previous_index(4, 3) == 1
+    assert index.get_previous_index(1, 0) is None
+    assert index.get_next_index(9, 0) is None
+
+
+def test_match_index_replace_lines():
+    index = FindMatchIndex()
+    index.add_matches([(1, 0, 2), (4, 3, 1), (5, 0, 1), (9, 0, 1)])
+    # lines 4 and 5 replaced by 3 lines
+    index.replace_lines(4, 5, 1, [(4, 1, 1), (6, 2, 2)])
+    assert index.get_matches_between(0, 100) == [
+        (1, 0, 2),
+        (4, 1, 1),
+        (6, 2, 2),
+        (10, 0, 1),
+    ]
+    # line 1 removed
+    index.replace_lines(1, 2, -1, [])
+    assert index.get_matches_between(0, 100) == [(3, 1, 1), (5, 2, 2), (9, 0, 1)]
+
+
+def test_editor_update_matches(qapp):
+    editor = LinePlainTextEdit()
+    editor.setPlainText(TEXT)
+    counts = []
+    editor.find_match_count_changed.connect(counts.append)
+    finished = []
+    editor.find_finished.connect(finished.append)
+
+    editor.find_text("^ERROR")
+    end_time = time.time() + 5
+    while not finished and time.time() < end_time:
+        qapp.processEvents()
+    assert finished == [3]
+
+    # only the modified lines are searched again, without waiting
+    cursor = QtGui.QTextCursor(editor.document())
+    cursor.insertText("ERROR new\n")
+    assert counts[-1] == 4
+    cursor.movePosition(QtGui.QTextCursor.End)
+    cursor.movePosition(QtGui.QTextCursor.StartOfBlock, QtGui.QTextCursor.KeepAnchor)
+    cursor.removeSelectedText()
+    assert counts[-1] == 3
+    editor.setTextCursor(QtGui.QTextCursor(editor.document()))
+    assert editor.find_next()
+    assert editor.textCursor().blockNumber() == 1
+    assert editor.find_next()
+    assert editor.textCursor().blockNumber() == 3
+
+    editor.setPlainText("ERROR\nERROR\ntext")
+    assert counts[-1] == 2
+
+
+def test_editor_line_separator(qapp):
+    editor = LinePlainTextEdit()
+    # a line separator (shift+enter) doesn't start a new block
+    editor.setPlainText("b\u2028x\nzz\nc\na")
+    finished = []
+    editor.find_finished.connect(finished.append)
+    editor.find_text("zz|a$")
+    end_time = time.time() + 5
+    while not finished and time.time() < end_time:
+        qapp.processEvents()
+    editor.setTextCursor(QtGui.QTextCursor(editor.document()))
+    assert editor.find_next()
+    assert editor.textCursor().blockNumber() == 1
+    assert editor.find_next()
+    assert editor.textCursor().blockNumber() == 3
+
+    replaced = []
+    editor.replace_finished.connect(replaced.append)
+    editor.replace_all("^(c|x)$", r"\1\1")
+    end_time = time.time() + 5
+    while not replaced and time.time() < end_time:
+        qapp.processEvents()
+    assert replaced == [1]
+    assert editor.document().toRawText() == "b\u2028x\u2029zz\u2029cc\u2029a"
@@ -0,0 +1,63 @@
+from lqtTextEditor._hugeFile import HugeFileIndex
+from lqtTextEditor._textLoader import TextLoaderWorker
+
+
+def run_loader(loader: TextLoaderWorker) -> list:
+    """
+    Run the loader in the current thread and get all its batches.
+    """
+    loader.run()
+    batches = []
+    batch = loader.get_batch()
+    while batch is not False:
+        batches.append(batch)
+        batch = loader.get_batch()
+    return batches
+
+
+def test_load_lines_batches(qapp):
+    lines = [f"line {index}\n" for index in range(100)]
+    loader = TextLoaderWorker(lines, batch_length=50, max_batches=1000)
+    ready = []
+    loader.batch_ready.connect(lambda: ready.append(True))
+
+    batches = run_loader(loader)
+    assert batches[-1] is None
+    assert len(ready) == len(batches)
+    assert len(batches) > 2
+    # batches are meant to be appended one after the other
+    assert "".join(batches[:-1]) == "\n".join(line.rstrip("\n") for line in lines)
+    assert loader.progress == 100
+    assert loader.error is None
+
+
+def test_load_file_same_as_huge_file(qapp, tmp_path):
+    path = tmp_path / "file.txt"
+    path.write_bytes(b"one\r\ntwo\rthree\n\r\nfour\r" * 50)
+
+    loader = TextLoaderWorker(path, batch_length=64, max_batches=1000)
+    batches = run_loader(loader)
+    assert batches[-1] is None
+    assert loader.progress == loader.total == path.stat().st_size
+
+    index = HugeFileIndex(path)
+    while index.index_next_segment():
+        pass
+    try:
+        assert "".join(batches[:-1]) == index.read_text(0, index.line_count)
+    finally:
+        index.close()
+
+
+def test_cancel(qapp):
+    def lines():
+        for index in range(100):
+            if index == 10:
+                loader.cancel()
+            yield str(index)
+
+    loader = TextLoaderWorker(lines(), batch_length=1, max_batches=1000)
+    batches = run_loader(loader)
+    assert loader.cancelled
+    # the end of the text is not signaled when cancelled
+    assert batches == ["0"] + [f"\n{index}" for index in range(1, 10)]